@@ -1,38 +1,39 @@
-import sqlite3 
 import functools
 from datetime import datetime
 import asyncio
 
+import async_db_pool
+
 def with_db_connection(func):
-    """ 
-    Decorator opens a database connection, passes it to the decorated function and ensure the connection is closed after use.
+    """
+    Decorator borrows a connection from the async pool, passes it to the decorated coroutine and returns it to the pool after use.
+    Queries run on the connection's own thread (aiosqlite), so other coroutines keep running while one waits on the database.
     """
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            timestimp = datetime.now().strftime("%Y-%m-%d %H:%M")
-            print(f"[{timestimp}] Opening database connection...")
-            await asyncio.sleep(4) #simulate opening connection to database
-            print("Connection opened  ✅")
+        timestimp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        print(f"[{timestimp}] Borrowing database connection from the pool...")
+        async with async_db_pool.get_pool('users.db').connection() as conn:
+            print("Connection ready  ✅")
             result = await func(conn, *args, **kwargs)
-            await asyncio.sleep(2) #simulate execution of the query
             print("Query execution finished ✅")
-            return result
-        finally:
-            conn.close()
-            print("Closing database connection.")
-            await asyncio.sleep(4) #simulate closing connection to database
-            print("Connection closed  ✅")
+        print("Connection returned to the pool  ✅")
+        return result
     return wrapper
 
 
-@with_db_connection 
-async def get_user_by_id(conn, user_id): 
-    cursor = conn.cursor() 
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,)) 
-    return cursor.fetchone() 
+@with_db_connection
+async def get_user_by_id(conn, user_id):
+    async with conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+        return await cursor.fetchone()
+
+
+async def main():
+    try:
+        return await get_user_by_id(user_id=1)
+    finally:
+        await async_db_pool.close_pools()
 
-#### Fetch user by ID with automatic connection handling 
-user = asyncio.run(get_user_by_id(user_id=1))
-print(user)
\ No newline at end of file
+#### Fetch user by ID with automatic connection handling
+user = asyncio.run(main())
+print(user)
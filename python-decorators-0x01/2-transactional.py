@@ -1,40 +1,37 @@
-import sqlite3 
 import functools
 from datetime import datetime
-import time
+
+import cache
+import db_pool
 
 def with_db_connection(func):
     """
-    Decorator opens a database connection, passes it to the decorated function 
-    and ensures the connection is closed after use.
+    Decorator borrows a database connection from the pool, passes it to the
+    decorated function and ensures the connection is returned after use.
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Opening database connection...")
-        time.sleep(2)  # Simulate connection delay
-        
-        conn = sqlite3.connect('users.db')
-        print("Connection opened ✅")
-        
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-            print("Closing database connection...")
-            time.sleep(1)  # Simulate closing delay
-            print("Database connection closed ✅")
+        print(f"[{timestamp}] Borrowing database connection from the pool...")
+        with db_pool.get_pool('users.db').connection() as conn:
+            print("Connection ready ✅")
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                print("Database connection returned to the pool ✅")
     return wrapper
 
 
 def transactional(func):
     """
     Decorator ensures a function running a database operation is wrapped in a transaction.
-    If the function raises an error, rollback; otherwise, commit the transaction.
+    If the function raises an error, rollback; otherwise, commit the transaction
+    and invalidate cached query results for every table it wrote to.
     """
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        statements = []
+        conn.set_trace_callback(statements.append)
         try:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             print(f"[{timestamp}] Starting a new transaction...")
@@ -42,11 +39,14 @@ def transactional(func):
             result = func(conn, *args, **kwargs)
             conn.commit()
             print("Transaction committed ✅")
-            return result
         except Exception as e:
             conn.rollback()
             print(f"Transaction rolled back due to error: {e}")
             raise
+        finally:
+            conn.set_trace_callback(None)
+        cache.invalidate_for_statements(statements)
+        return result
     return wrapper
 
 
@@ -1,20 +1,17 @@
 import time
-import sqlite3 
 import functools
 
+import db_pool
+
 # Decorator to automatically provide database connection
 def with_db_connection(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Create a connection to SQLite database
-        conn = sqlite3.connect('users.db')
-        try:
-            # Pass the connection to the decorated function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close the connection
-            conn.close()
+        # Borrow a connection from the shared users.db pool
+        with db_pool.get_pool('users.db').connection() as conn:
+            # Pass the connection to the decorated function; it goes back
+            # to the pool (not closed) afterwards
+            return func(conn, *args, **kwargs)
     return wrapper
 
 # Decorator to retry function on failure
@@ -1,69 +1,88 @@
 import time
-import sqlite3 
 import functools
 
+import cache
+import db_pool
 
-query_cache = {}
+
+# Bounded LRU of query results; entries expire after five minutes and are
+# dropped when transactional commits a write to a table they read.
+# QUERY_CACHE_STORE picks where they live: "memory" (default),
+# "sqlite:///query_cache.db" to share them between worker processes and
+# restarts, or "kv://localhost:6390" for a `python3 cache_stores.py` server
+# (both sides need the same secret in QUERY_CACHE_AUTHKEY).
+query_cache = cache.QueryCache(
+    max_entries=256, max_bytes=16 * 1024 * 1024, ttl=300,
+    store=cache.shared_store())
+
+
+def seed_users(conn):
+    """Create and fill the sample users table in a new in-memory connection"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            email TEXT
+        )
+    ''')
+    cursor.execute("INSERT INTO users (name, email) VALUES ('Alice', 'alice@example.com')")
+    cursor.execute("INSERT INTO users (name, email) VALUES ('Bob', 'bob@example.com')")
+    cursor.execute("INSERT INTO users (name, email) VALUES ('Charlie', 'charlie@example.com')")
+    conn.commit()
 
 
 def with_db_connection(func):
     """Decorator that provides a database connection to the wrapped function"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Create a connection to an in-memory SQLite database
-        conn = sqlite3.connect(':memory:')
-        
-        # Create a sample users table for testing
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                name TEXT,
-                email TEXT
-            )
-        ''')
-        cursor.execute("INSERT INTO users (name, email) VALUES ('Alice', 'alice@example.com')")
-        cursor.execute("INSERT INTO users (name, email) VALUES ('Bob', 'bob@example.com')")
-        cursor.execute("INSERT INTO users (name, email) VALUES ('Charlie', 'charlie@example.com')")
-        conn.commit()
-        
-        try:
+        # Borrow a pooled in-memory SQLite connection; each one is seeded
+        # with the sample users table once, when the pool opens it
+        pool = db_pool.get_pool(':memory:', initializer=seed_users)
+        with pool.connection() as conn:
             # Call the original function with the connection
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
+            return func(conn, *args, **kwargs)
     
     return wrapper
 
 
-def cache_query(func):
+def cache_query(func=None, *, query_cache=query_cache, ttl=None):
     """
-    Decorator that caches database query results based on the SQL query string.
+    Decorator that caches database query results based on the SQL query and
+    its parameters.
     
     How it works:
-    1. Extracts the 'query' parameter from function arguments
-    2. Checks if this query has been executed before (exists in cache)
-    3. If cached: returns the stored result immediately
-    4. If not cached: executes the query, stores result, then returns it
+    1. Extracts the 'query' (and optional 'params') from function arguments
+    2. Builds a key from the normalized SQL plus the bound parameters
+    3. If cached and not expired: returns the stored result immediately
+    4. If not cached: executes the query, stores result, then returns it;
+       threads missing the same key meanwhile wait for that one execution
+    
+    Use as @cache_query, or @cache_query(query_cache=..., ttl=...) to pick
+    another QueryCache or override its TTL.
     """
+    if func is None:
+        return lambda func: cache_query(func, query_cache=query_cache, ttl=ttl)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Get the query string from kwargs
+        # Get the query string and parameters from kwargs
         query = kwargs.get('query')
+        key = cache.make_key(query, kwargs.get('params'))
         
-        # Check if this query result is already in the cache
-        if query in query_cache:
-            print(f"📦 Cache HIT! Using cached result for query: {query[:50]}...")
-            return query_cache[query]
+        def run_query():
+            # Only the first caller to miss a key gets here; concurrent
+            # callers for the same query wait for this result instead
+            print(f"🔍 Cache MISS! Executing query: {query[:50]}...")
+            return func(*args, **kwargs)
         
-        # If not in cache, execute the function
-        print(f"🔍 Cache MISS! Executing query: {query[:50]}...")
-        result = func(*args, **kwargs)
-        
-        # Store the result in cache for future use
-        query_cache[query] = result
-        print(f"💾 Result cached for future use!")
+        status, result = query_cache.get_or_compute(key, run_query, ttl)
+        if status == "hit":
+            print(f"📦 Cache HIT! Using cached result for query: {query[:50]}...")
+        elif status == "coalesced":
+            print(f"⏳ Shared in-flight result for query: {query[:50]}...")
+        else:
+            print(f"💾 Result cached for future use!")
         
         return result
     
@@ -110,6 +129,7 @@ print(f"Time taken: {(end_time - start_time) * 1000:.2f}ms\n")
 print("=" * 60)
 print("Current cache contents:")
 print("=" * 60)
-for query, result in query_cache.items():
-    print(f"Query: {query}")
-    print(f"Cached Result: {result}\n")
\ No newline at end of file
+for (query, params), result in query_cache.items():
+    print(f"Query: {query} {params or ''}")
+    print(f"Cached Result: {result}\n")
+print(f"Cache stats: {query_cache.stats()}")
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Async SQLite connection pool behind the async with_db_connection decorator.
+
+Connections are aiosqlite connections: each one runs its queries on its own
+worker thread and hands results back to the event loop, so a running query
+never blocks other coroutines. Connections are opened lazily up to
+max_size, closed after idle_timeout seconds unused, and pre-pinged on every
+checkout. aiosqlite connections belong to the event loop that opened them,
+so there is one pool per loop and database.
+
+    @with_db_connection
+    async def get_user_by_id(conn, user_id):
+        async with conn.execute("SELECT ...", (user_id,)) as cursor:
+            return await cursor.fetchone()
+"""
+import asyncio
+import contextlib
+import functools
+import time
+
+import aiosqlite
+
+
+class AsyncSQLitePool:
+    """
+    Pool of aiosqlite connections to one SQLite database.
+
+    Args:
+        database (str): Path passed to aiosqlite.connect().
+        max_size (int): Most connections open at once; acquire() waits up to
+            `timeout` seconds for one to be released beyond that.
+        idle_timeout (float): Close connections idle longer than this.
+        timeout (float): Seconds acquire() waits before raising TimeoutError.
+        initializer: Coroutine function awaited with each new connection.
+    """
+
+    def __init__(self, database="users.db", max_size=10, idle_timeout=300,
+                 timeout=30, initializer=None, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.initializer = initializer
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # [(connection, released at)], most recent last
+        self._available = asyncio.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._ping_failures = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _new_connection(self):
+        conn = await aiosqlite.connect(self.database, **self.connect_kwargs)
+        if self.initializer is not None:
+            await self.initializer(conn)
+        return conn
+
+    async def _close(self, conn):
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        self._closed += 1
+
+    def _take_expired(self, now):
+        """Remove idle connections past idle_timeout; caller holds the lock."""
+        if self.idle_timeout is None:
+            return []
+        expired = [conn for conn, released in self._idle
+                   if now - released > self.idle_timeout]
+        if expired:
+            self._idle = [entry for entry in self._idle
+                          if now - entry[1] <= self.idle_timeout]
+            self._open -= len(expired)
+        return expired
+
+    @staticmethod
+    async def _ping(conn):
+        try:
+            await conn.execute_fetchall("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self, timeout=None):
+        """Borrow a connection; hand it back with release()."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        expired = []
+        async with self._available:
+            while True:
+                expired += self._take_expired(time.monotonic())
+                if self._idle:
+                    conn = self._idle.pop()[0]
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    conn = None  # opened below, outside the lock
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No connection available after {timeout}s "
+                        f"(pool size {self.max_size})")
+                try:
+                    await asyncio.wait_for(self._available.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            self._in_use += 1
+        for old in expired:
+            await self._close(old)
+
+        try:
+            if conn is not None and not await self._ping(conn):
+                self._ping_failures += 1
+                await self._close(conn)
+                conn = None
+            if conn is None:
+                conn = await self._new_connection()
+                self._created += 1
+        except BaseException:
+            async with self._available:
+                self._open -= 1
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+        waited = time.perf_counter() - start
+        self._checkouts += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    async def release(self, conn):
+        """Return a borrowed connection, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            healthy = True
+        except Exception:
+            healthy = False
+        if not healthy:
+            await self._close(conn)
+        async with self._available:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._open -= 1
+            self._available.notify()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        """Async context manager that borrows a connection for the block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        """Close every idle connection."""
+        async with self._available:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            await self._close(conn)
+
+    def stats(self):
+        """Connection counts and checkout wait times since the pool was created."""
+        return {
+            "max_size": self.max_size,
+            "open": self._open,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "created": self._created,
+            "closed": self._closed,
+            "checkouts": self._checkouts,
+            "ping_failures": self._ping_failures,
+            "wait_total": self._wait_total,
+            "wait_max": self._wait_max,
+            "wait_avg": (self._wait_total / self._checkouts
+                         if self._checkouts else 0.0),
+        }
+
+
+_pools = {}
+
+
+def get_pool(database="users.db", **options):
+    """
+    Return the pool for `database` on the running event loop, creating it
+    with `options` (see AsyncSQLitePool) on first use.
+    """
+    key = (asyncio.get_running_loop(), database)
+    if key not in _pools:
+        _pools[key] = AsyncSQLitePool(database, **options)
+    return _pools[key]
+
+
+async def close_pools():
+    """Close the pools of the running event loop; call before the loop ends."""
+    loop = asyncio.get_running_loop()
+    for key in [key for key in _pools if key[0] is loop]:
+        await _pools.pop(key).close()
+
+
+def with_db_connection(func=None, *, database="users.db", **options):
+    """
+    Decorator that passes a pooled aiosqlite connection to the wrapped
+    coroutine function as its first argument and returns it to the pool
+    afterwards.
+
+    Use as @with_db_connection, or @with_db_connection(database=...,
+    max_size=...) for another database or pool settings.
+    """
+    if func is None:
+        return lambda func: with_db_connection(func, database=database, **options)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with get_pool(database, **options).connection() as conn:
+            return await func(conn, *args, **kwargs)
+    return wrapper
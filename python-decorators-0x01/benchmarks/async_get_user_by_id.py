@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""
+Many concurrent get_user_by_id() calls on one event loop: the old
+decorator (sqlite3.connect and a blocking query on the loop thread, per
+call) vs the pooled aiosqlite decorator from async_db_pool.
+
+Alongside throughput it reports the worst event-loop stall seen by a
+ticker coroutine, i.e. how long other coroutines were kept waiting.
+
+Run from the python-decorators-0x01 directory:
+    python3 benchmarks/async_get_user_by_id.py 1000
+"""
+import asyncio
+import functools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+async_db_pool = __import__('async_db_pool')
+
+USERS = 10000
+
+
+def create_users(path, rows=USERS):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL
+        )
+    """)
+    conn.executemany("INSERT INTO users (name, email) VALUES (?, ?)",
+                     ((f"user{i}", f"user{i}@example.com") for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def blocking_connection(database):
+    """The previous decorator: connect, query and close on the loop thread."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(database)
+            try:
+                return await func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+    return decorator
+
+
+async def ticker(stop, interval=0.001):
+    """Largest delay between when a sleep should end and when it did."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(get_user_by_id, calls):
+    ids = [random.randint(1, USERS) for _ in range(calls)]
+    stop = asyncio.Event()
+    lag = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    users = await asyncio.gather(*(get_user_by_id(user_id=i) for i in ids))
+    seconds = time.perf_counter() - start
+    stop.set()
+    assert all(users)
+    return seconds, await lag
+
+
+async def blocking(database, calls):
+    @blocking_connection(database)
+    async def get_user_by_id(conn, user_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        return cursor.fetchone()
+    return await run(get_user_by_id, calls)
+
+
+async def pooled(database, calls, pool_size):
+    @async_db_pool.with_db_connection(database=database, max_size=pool_size)
+    async def get_user_by_id(conn, user_id):
+        async with conn.execute("SELECT * FROM users WHERE id = ?",
+                                (user_id,)) as cursor:
+            return await cursor.fetchone()
+    try:
+        return await run(get_user_by_id, calls)
+    finally:
+        print(f"pool stats: {async_db_pool.get_pool(database).stats()}")
+        await async_db_pool.close_pools()
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "users.db")
+        create_users(database)
+        for name, (seconds, lag) in (
+                ("blocking sqlite3", asyncio.run(blocking(database, calls))),
+                (f"aiosqlite pool({pool_size})",
+                 asyncio.run(pooled(database, calls, pool_size)))):
+            print(f"{name:>19}: {calls} calls in {seconds:.3f}s "
+                  f"({calls / seconds:.0f} calls/sec), "
+                  f"worst loop stall {lag * 1000:.1f}ms")
@@ -0,0 +1,283 @@
+"""
+Bounded query result cache for the cache_query decorator.
+
+Entries are keyed on the normalized SQL plus its bound parameters, evicted
+least-recently-used once the entry or byte budget is exceeded, expire after
+a per-entry TTL, and are dropped when a table they read from is written
+(see invalidate_tables(), called by transactional after each commit).
+
+The cache is thread-safe, and get_or_compute() coalesces concurrent misses
+on the same key so only one caller runs the query (single-flight). Where the
+entries live is pluggable (see cache_stores): in this process, in a SQLite
+file shared by every worker, or in a local key-value server. Invalidation
+and the in-flight staleness check happen in the store, so with a shared
+store they hold across workers; an in-process store only ever sees this
+process's writes, so rely on the TTL there when other processes write.
+"""
+import os
+import re
+import threading
+import time
+import weakref
+
+import cache_stores
+
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_TABLE = re.compile(r"\b(?:join|into|update|table)\s+[`\"\[]?(\w+)", re.IGNORECASE)
+# A FROM clause up to the next clause keyword, so "FROM a x, b y" yields both
+_FROM = re.compile(
+    r"\bfrom\s+([^;()]+?)(?=\b(?:where|group|order|having|limit|union|join|inner|"
+    r"left|right|full|cross|natural|on|using|window)\b|[;()]|$)",
+    re.IGNORECASE | re.DOTALL)
+_FROM_ITEM = re.compile(r"\s*[`\"\[]?(\w+)")
+# Tag for statements whose tables could not be told: matches every table
+ANY_TABLE = "*"
+_WRITE = re.compile(r"^\s*(?:insert|update|delete|replace|create|drop|alter)\b",
+                    re.IGNORECASE)
+
+_caches = weakref.WeakSet()
+
+
+def normalize_sql(query):
+    """
+    Collapse whitespace outside string literals and drop a trailing ';' so
+    equivalent SQL shares a key.
+    """
+    parts = _QUOTED.split(query)
+    # Odd parts are the quoted literals, kept exactly as written
+    parts[::2] = [" ".join(part.split()) for part in parts[::2]]
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+
+def tables_in(query):
+    """
+    Lower-cased names of the tables a statement reads or writes, or
+    {ANY_TABLE} when none can be found.
+    """
+    query = _QUOTED.sub("''", query)
+    names = set(_TABLE.findall(query))
+    for clause in _FROM.findall(query):
+        for item in clause.split(","):
+            match = _FROM_ITEM.match(item)
+            if match:
+                names.add(match.group(1))
+    return frozenset(name.lower() for name in names) or frozenset((ANY_TABLE,))
+
+
+def is_write(query):
+    return bool(_WRITE.match(query))
+
+
+def make_key(query, params=None):
+    if isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    elif params is not None:
+        params = tuple(params)
+    return normalize_sql(query), params or ()
+
+
+class _Flight:
+    """A query being computed by one caller while others wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class QueryCache:
+    """
+    LRU cache of query results.
+
+    Args:
+        max_entries (int): Evict the least recently used entry beyond this.
+        max_bytes (int): Also evict while the stored size of all results
+            (pickled; compressed in SQLiteStore) exceeds this. None for no byte limit.
+        ttl (float): Seconds an entry stays valid. None never expires.
+        store: Where entries are kept (see cache_stores), a MemoryStore
+            by default.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store if store is not None else cache_stores.MemoryStore()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        self._lock = threading.RLock()
+        self._flights = {}
+        _caches.add(self)
+
+    def get(self, key):
+        """Return (True, result) on a hit, (False, None) on a miss."""
+        with self._lock:
+            found, result = self._lookup(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found, result
+
+    def _lookup(self, key):
+        # get() without the hit/miss counts, dropping an expired entry
+        entry = self.store.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            self.store.delete(key)
+            self.expirations += 1
+            entry = None
+        return (False, None) if entry is None else (True, entry[0])
+
+    def set(self, key, result, ttl=None, snapshot=None):
+        """
+        Store `result`. With a `snapshot` from store.versions(), it is only
+        stored if none of the tables it reads were written since.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            if not self.store.set(key, result, expires, tables_in(key[0]), snapshot):
+                return False
+            self.evictions += self.store.evict(self.max_entries, self.max_bytes)
+            return True
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """
+        Return (status, result) for `key`, calling compute() on a miss.
+
+        Only the first caller to miss a key runs compute(); concurrent callers
+        for the same key wait for its result (or its exception) instead of
+        hitting the database too. status is "hit", "miss" or "coalesced".
+        """
+        with self._lock:
+            found, result = self._lookup(key)
+            if found:
+                self.hits += 1
+                return "hit", result
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                # Only the caller that runs the query counts as a miss
+                self.misses += 1
+                flight = self._flights[key] = _Flight()
+                # Taken before the query runs: a write to a table it reads
+                # committed meanwhile, in any process sharing the store,
+                # keeps this possibly stale result out of the cache
+                snapshot = self.store.versions(tables_in(key[0]))
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return "coalesced", flight.result
+        try:
+            flight.result = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        self.set(key, flight.result, ttl, snapshot)
+        return "miss", flight.result
+
+    def invalidate_tables(self, tables):
+        """
+        Drop every entry that reads one of `tables`, or every entry when
+        `tables` includes ANY_TABLE. Returns the count.
+        """
+        with self._lock:
+            removed = _invalidate_store(self.store, tables)
+            self.invalidations += removed
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self.store.clear()
+
+    def items(self):
+        """(key, result) pairs, least recently used first."""
+        with self._lock:
+            return self.store.items()
+
+    def __len__(self):
+        with self._lock:
+            return self.store.count()
+
+    def close(self):
+        with self._lock:
+            self.store.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": self.store.count(),
+                "bytes": self.store.nbytes(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
+
+
+def _invalidate_store(store, tables):
+    tables = {table.lower() for table in tables}
+    if ANY_TABLE in tables:
+        removed = store.count()
+        store.clear()
+        return removed
+    # Entries whose tables are unknown may read any of them
+    tables.add(ANY_TABLE)
+    return store.invalidate(tables)
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def shared_store():
+    """
+    The store named by QUERY_CACHE_STORE (see cache_stores.open_store()),
+    opened once per process, or None for the default in-process store.
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            if os.environ.get("QUERY_CACHE_STORE", "memory") == "memory":
+                return None
+            _shared_store = cache_stores.open_store()
+        return _shared_store
+
+
+def invalidate_tables(tables):
+    """
+    Drop entries reading any of `tables` from every live QueryCache and from
+    the shared store, even when this process has no cache on it.
+    """
+    removed = 0
+    seen = set()
+    for query_cache in list(_caches):
+        removed += query_cache.invalidate_tables(tables)
+        seen.add(id(query_cache.store))
+    store = shared_store()
+    if store is not None and id(store) not in seen:
+        removed += _invalidate_store(store, tables)
+    return removed
+
+
+def invalidate_for_statements(statements):
+    """Invalidate the tables written by any of the given SQL statements."""
+    written = set()
+    for statement in statements:
+        if is_write(statement):
+            written |= tables_in(statement)
+    return invalidate_tables(written) if written else 0
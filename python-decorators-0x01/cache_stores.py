@@ -0,0 +1,421 @@
+"""
+Storage backends for cache.QueryCache.
+
+    MemoryStore   in-process OrderedDict (the default)
+    SQLiteStore   on-disk SQLite file shared by every process on the host;
+                  results are pickled and zlib-compressed, and survive restarts
+    RemoteStore   client of a local key-value server (serve_store()) that
+                  keeps one MemoryStore for all of its clients; needs a
+                  shared secret in QUERY_CACHE_AUTHKEY(_FILE)
+
+Every store keeps (result, expires, tables) per key in least-recently-used
+order, plus a write counter per table. invalidate() bumps the counters of
+the tables written and drops their entries; set() takes the counters read
+by versions() before the query ran and refuses to store the result if any
+of them moved since. Both happen inside the store, so with a shared store
+a write in one worker also stops a slower worker from caching a result it
+computed before that write. QueryCache does the TTL checks and counting.
+Expiry times are wall-clock (time.time()) so they mean the same thing in
+every process.
+
+open_store() builds a store from a spec string: "memory",
+"sqlite:///path/to/cache.db" or "kv://host:port".
+"""
+import contextlib
+import marshal
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_ADDRESS = ("localhost", 6390)
+MAX_MESSAGE = 64 * 1024 * 1024
+# Version counter bumped by clear(); part of every versions() snapshot
+_EPOCH = ""
+
+
+def _sizeof(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class MemoryStore:
+    """In-process LRU storage."""
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (result, expires, size, tables)
+        self._bytes = 0
+        self._versions = {}
+
+    def versions(self, tables):
+        """Snapshot of the write counters of `tables`, for set()."""
+        return tuple(self._versions.get(name, 0)
+                     for name in (_EPOCH, *sorted(tables)))
+
+    def _bump(self, names):
+        for name in names:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def get(self, key):
+        """Return (result, expires) and mark the key recently used, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def set(self, key, result, expires, tables, snapshot=None):
+        """Store `result` unless `tables` were written since `snapshot`."""
+        if snapshot is not None and tuple(snapshot) != self.versions(tables):
+            return False
+        size = _sizeof(result)
+        self.delete(key)
+        self._entries[key] = (result, expires, size, frozenset(tables))
+        self._bytes += size
+        return True
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def evict(self, max_entries, max_bytes):
+        """Drop least recently used entries until within both limits."""
+        evicted = 0
+        while self._entries and (
+                len(self._entries) > max_entries
+                or (max_bytes is not None and self._bytes > max_bytes)):
+            self.delete(next(iter(self._entries)))
+            evicted += 1
+        return evicted
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        self._bump(tables)
+        stale = [key for key, entry in self._entries.items() if entry[3] & tables]
+        for key in stale:
+            self.delete(key)
+        return len(stale)
+
+    def clear(self):
+        self._bump((_EPOCH,))
+        self._entries.clear()
+        self._bytes = 0
+
+    def items(self):
+        return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def count(self):
+        return len(self._entries)
+
+    def nbytes(self):
+        return self._bytes
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """
+    Shared on-disk storage in a SQLite file (WAL mode, so readers in other
+    processes are not blocked by a writer).
+
+    LRU order is approximate: a hit only rewrites an entry's last-used stamp
+    when it is more than touch_interval seconds old, so most hits are pure
+    reads and do not queue on SQLite's single writer lock.
+
+    Write counters live in the same file, so invalidation reaches every
+    process sharing it.
+    """
+
+    def __init__(self, path="query_cache.db", timeout=30, touch_interval=60):
+        self.path = path
+        self.touch_interval = touch_interval
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_cache (
+                key BLOB PRIMARY KEY,
+                result BLOB NOT NULL,
+                expires REAL,
+                size INTEGER NOT NULL,
+                tables TEXT NOT NULL,
+                used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_query_cache_used ON query_cache (used)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_cache_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction, taken up front so the version check and the
+        write it guards cannot interleave with another process."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _read_versions(self, tables):
+        names = (_EPOCH, *sorted(tables))
+        found = dict(self._conn.execute(
+            "SELECT name, version FROM query_cache_versions "
+            f"WHERE name IN ({', '.join('?' * len(names))})", names))
+        return tuple(found.get(name, 0) for name in names)
+
+    def versions(self, tables):
+        with self._lock:
+            return self._read_versions(tables)
+
+    def _bump(self, names):
+        self._conn.executemany(
+            "INSERT INTO query_cache_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+            [(name,) for name in names])
+
+    @staticmethod
+    def _dump_key(key):
+        return pickle.dumps(key, protocol=4)
+
+    def get(self, key):
+        blob = self._dump_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, expires, used FROM query_cache WHERE key = ?",
+                (blob,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > self.touch_interval:
+                self._conn.execute("UPDATE query_cache SET used = ? WHERE key = ?",
+                                   (now, blob))
+        return pickle.loads(zlib.decompress(row[0])), row[1]
+
+    def set(self, key, result, expires, tables, snapshot=None):
+        """Store `result` unless `tables` were written since `snapshot`."""
+        data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        # Comma-delimited so invalidate() can match whole names with LIKE
+        names = "," + ",".join(sorted(tables)) + ","
+        with self._transaction():
+            if snapshot is not None and tuple(snapshot) != self._read_versions(tables):
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_cache "
+                "(key, result, expires, size, tables, used) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._dump_key(key), data, expires, len(data), names, time.time()))
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM query_cache WHERE key = ?",
+                               (self._dump_key(key),))
+
+    def evict(self, max_entries, max_bytes):
+        with self._transaction():
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM query_cache").fetchone()
+            if count <= max_entries and (max_bytes is None or total <= max_bytes):
+                return 0
+            stale = []
+            for blob, size in self._conn.execute(
+                    "SELECT key, size FROM query_cache ORDER BY used"):
+                if count <= max_entries and (max_bytes is None or total <= max_bytes):
+                    break
+                stale.append((blob,))
+                count -= 1
+                total -= size
+            self._conn.executemany("DELETE FROM query_cache WHERE key = ?", stale)
+        return len(stale)
+
+    def invalidate(self, tables):
+        removed = 0
+        with self._transaction():
+            self._bump(tables)
+            for table in tables:
+                removed += self._conn.execute(
+                    "DELETE FROM query_cache WHERE tables LIKE ?",
+                    (f"%,{table},%",)).rowcount
+        return removed
+
+    def clear(self):
+        with self._transaction():
+            self._bump((_EPOCH,))
+            self._conn.execute("DELETE FROM query_cache")
+
+    def items(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, result FROM query_cache ORDER BY used").fetchall()
+        return [(pickle.loads(blob), pickle.loads(zlib.decompress(data)))
+                for blob, data in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM query_cache").fetchone()[0]
+
+    def nbytes(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM query_cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_STORE_METHODS = frozenset(
+    ("get", "set", "delete", "evict", "invalidate", "clear", "items", "count",
+     "nbytes", "versions"))
+
+
+class RemoteStoreError(Exception):
+    """A store method failed on the key-value server."""
+
+
+def _authkey():
+    """
+    The shared secret for the key-value server: QUERY_CACHE_AUTHKEY, or the
+    contents of the file named by QUERY_CACHE_AUTHKEY_FILE. There is no
+    default, so a server cannot be started with a guessable key.
+    """
+    key = os.environ.get("QUERY_CACHE_AUTHKEY")
+    if key:
+        return key.encode()
+    path = os.environ.get("QUERY_CACHE_AUTHKEY_FILE")
+    if path:
+        with open(path, "rb") as secret:
+            key = secret.read().strip()
+        if key:
+            return key
+    raise RuntimeError(
+        "Set QUERY_CACHE_AUTHKEY or QUERY_CACHE_AUTHKEY_FILE to a secret "
+        "shared by the query cache server and its clients")
+
+
+class RemoteStore:
+    """
+    Client of a store served by serve_store(), over one connection.
+
+    Requests and replies are marshal-encoded plain data, never pickles, so
+    neither side can make the other run code. Results that marshal cannot
+    encode (anything beyond None, bools, numbers, strings, bytes and
+    tuples, lists, sets and dicts of those) are not cached.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None):
+        self._conn = Client(address, authkey=authkey or _authkey())
+        self._lock = threading.Lock()
+
+    def _call(self, method, *args):
+        request = marshal.dumps((method, args))
+        with self._lock:
+            self._conn.send_bytes(request)
+            ok, value = marshal.loads(self._conn.recv_bytes(MAX_MESSAGE))
+        if not ok:
+            raise RemoteStoreError(value)
+        return value
+
+    def get(self, key):
+        try:
+            return self._call("get", key)
+        except ValueError:  # unmarshallable parameters: never cached
+            return None
+
+    def set(self, key, result, expires, tables, snapshot=None):
+        try:
+            return self._call("set", key, result, expires, frozenset(tables),
+                              snapshot)
+        except ValueError:  # unmarshallable result
+            return False
+
+    def __getattr__(self, name):
+        if name not in _STORE_METHODS:
+            raise AttributeError(name)
+        return lambda *args: self._call(name, *args)
+
+    def close(self):
+        self._conn.close()
+
+
+def _serve_client(conn, store, lock):
+    with conn:
+        while True:
+            try:
+                request = conn.recv_bytes(MAX_MESSAGE)
+            except (EOFError, OSError):
+                return
+            try:
+                method, args = marshal.loads(request)
+                if method not in _STORE_METHODS:
+                    raise AttributeError(method)
+                with lock:
+                    reply = marshal.dumps((True, getattr(store, method)(*args)))
+            except Exception as error:
+                reply = marshal.dumps((False, f"{type(error).__name__}: {error}"))
+            conn.send_bytes(reply)
+
+
+def serve_store(address=DEFAULT_ADDRESS, authkey=None, store=None):
+    """
+    Run a local key-value server holding one store (a MemoryStore by
+    default) for every RemoteStore client. Blocks; one thread per client.
+    Clients must present the authkey (see _authkey()) before anything they
+    send is decoded.
+    """
+    authkey = authkey or _authkey()
+    store = store if store is not None else MemoryStore()
+    lock = threading.Lock()
+    with Listener(address, authkey=authkey) as listener:
+        print(f"Query cache server listening on {listener.address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError, EOFError):
+                continue  # a client that failed the handshake
+            threading.Thread(target=_serve_client, args=(conn, store, lock),
+                             daemon=True).start()
+
+
+def open_store(spec=None):
+    """
+    Build a store from "memory", "sqlite:///path" or "kv://host:port",
+    by default from the QUERY_CACHE_STORE environment variable.
+    """
+    if spec is None:
+        spec = os.environ.get("QUERY_CACHE_STORE", "memory")
+    if spec == "memory":
+        return MemoryStore()
+    if spec.startswith("sqlite:///"):
+        return SQLiteStore(spec[len("sqlite:///"):])
+    if spec.startswith("kv://"):
+        host, _, port = spec[len("kv://"):].rpartition(":")
+        return RemoteStore((host or "localhost", int(port)))
+    raise ValueError(f"Unknown query cache store: {spec!r}")
+
+
+if __name__ == "__main__":
+    # QUERY_CACHE_AUTHKEY=... python3 cache_stores.py [port]
+    #   -- start the local cache server
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ADDRESS[1]
+    serve_store((DEFAULT_ADDRESS[0], port))
@@ -0,0 +1,234 @@
+"""
+Thread-safe SQLite connection pool behind the with_db_connection decorators.
+
+Connections are opened lazily up to max_size and reused instead of being
+opened and closed on every call. A thread gets back the connection it used
+last when that one is idle (per-thread affinity: its page cache and
+prepared statements stay warm), otherwise any idle connection. Idle
+connections are closed after idle_timeout seconds, and every checkout
+pre-pings the connection and replaces it if it no longer works.
+
+    @with_db_connection
+    def fetch_users(conn):
+        ...
+
+    db_pool.get_pool("users.db").stats()
+"""
+import contextlib
+import functools
+import sqlite3
+import threading
+import time
+
+
+class SQLitePool:
+    """
+    Pool of connections to one SQLite database.
+
+    Args:
+        database (str): Path passed to sqlite3.connect().
+        max_size (int): Most connections open at once; acquire() waits up to
+            `timeout` seconds for one to be released beyond that.
+        idle_timeout (float): Close connections idle longer than this.
+        timeout (float): Seconds acquire() waits before raising TimeoutError.
+        initializer: Called with each new connection (e.g. to create tables).
+    """
+
+    def __init__(self, database="users.db", max_size=5, idle_timeout=300,
+                 timeout=30, initializer=None, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.initializer = initializer
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # [(connection, released at)], most recent last
+        self._local = threading.local()
+        self._available = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._affinity_hits = 0
+        self._ping_failures = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _new_connection(self):
+        # Connections may move between threads, but only ever one at a time
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               **self.connect_kwargs)
+        if self.initializer is not None:
+            self.initializer(conn)
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._closed += 1
+        self._open -= 1
+
+    def _reap_idle(self, now):
+        """Close idle connections past idle_timeout; caller holds the lock."""
+        if self.idle_timeout is None:
+            return
+        keep = []
+        for entry in self._idle:
+            if now - entry[1] > self.idle_timeout:
+                self._close(entry[0])
+            else:
+                keep.append(entry)
+        self._idle = keep
+
+    def _take_idle(self):
+        """Pop this thread's last connection if idle, else the newest idle one."""
+        last = getattr(self._local, "last", None)
+        for i, entry in enumerate(self._idle):
+            if entry[0] is last:
+                self._affinity_hits += 1
+                return self._idle.pop(i)[0]
+        return self._idle.pop()[0]
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self, timeout=None):
+        """Borrow a connection; hand it back with release()."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while True:
+                self._reap_idle(time.monotonic())
+                if self._idle:
+                    conn = self._take_idle()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    conn = None  # opened below, outside the lock
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No connection available after {timeout}s "
+                        f"(pool size {self.max_size})")
+                self._available.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if conn is not None and not self._ping(conn):
+                with self._available:
+                    self._ping_failures += 1
+                    self._close(conn)
+                    self._open += 1
+                conn = None
+            if conn is None:
+                conn = self._new_connection()
+                with self._available:
+                    self._created += 1
+        except BaseException:
+            with self._available:
+                self._open -= 1
+                self._in_use -= 1
+                self._available.notify()
+            raise
+
+        waited = time.perf_counter() - start
+        with self._available:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        self._local.last = conn
+        return conn
+
+    def release(self, conn):
+        """Return a borrowed connection, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+        with self._available:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._close(conn)
+            self._available.notify()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Context manager that borrows a connection for the with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._available:
+            for entry in self._idle:
+                self._close(entry[0])
+            self._idle = []
+
+    def stats(self):
+        """Connection counts and checkout wait times since the pool was created."""
+        with self._available:
+            return {
+                "max_size": self.max_size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": self._checkouts,
+                "affinity_hits": self._affinity_hits,
+                "ping_failures": self._ping_failures,
+                "wait_total": self._wait_total,
+                "wait_max": self._wait_max,
+                "wait_avg": (self._wait_total / self._checkouts
+                             if self._checkouts else 0.0),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database="users.db", **options):
+    """
+    Return the shared pool for `database`, creating it with `options`
+    (see SQLitePool) on first use.
+    """
+    with _pools_lock:
+        if database not in _pools:
+            _pools[database] = SQLitePool(database, **options)
+        return _pools[database]
+
+
+def with_db_connection(func=None, *, database="users.db", **options):
+    """
+    Decorator that passes a pooled connection to the wrapped function as its
+    first argument and returns it to the pool afterwards.
+
+    Use as @with_db_connection, or @with_db_connection(database=...,
+    max_size=...) for another database or pool settings.
+    """
+    if func is None:
+        return lambda func: with_db_connection(func, database=database, **options)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with get_pool(database, **options).connection() as conn:
+            return func(conn, *args, **kwargs)
+    return wrapper
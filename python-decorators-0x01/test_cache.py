@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cache module.
+
+Classes:
+    TestKeys: normalize_sql, make_key and tables_in
+    TestQueryCache: LRU bounds, TTL and table invalidation
+    TestGetOrCompute: single-flight coalescing and invalidation during a compute
+    TestSharedStore: invalidation through a SQLite store shared by two caches
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import cache
+import cache_stores
+
+
+class TestKeys(unittest.TestCase):
+    """Tests for cache keys and table extraction."""
+
+    def test_whitespace_outside_literals_is_collapsed(self):
+        """Layout differences outside string literals share a key."""
+        self.assertEqual(cache.make_key("SELECT *\n  FROM users ;"),
+                         cache.make_key("SELECT * FROM users"))
+
+    def test_whitespace_inside_literals_is_kept(self):
+        """Queries differing only inside a literal get different keys."""
+        self.assertNotEqual(
+            cache.make_key("SELECT * FROM users WHERE name = 'A  B'"),
+            cache.make_key("SELECT * FROM users WHERE name = 'A B'"))
+
+    def test_params_are_part_of_the_key(self):
+        """The same SQL with other bound parameters is another entry."""
+        query = "SELECT * FROM users WHERE id = ?"
+        self.assertNotEqual(cache.make_key(query, (1,)), cache.make_key(query, (2,)))
+        self.assertEqual(cache.make_key(query, [1]), cache.make_key(query, (1,)))
+
+    def test_tables_in(self):
+        """Every table of a FROM list, join or subquery is found."""
+        self.assertEqual(
+            cache.tables_in("SELECT * FROM users u, orders o WHERE u.id = o.uid"),
+            {"users", "orders"})
+        self.assertEqual(
+            cache.tables_in("SELECT * FROM (SELECT * FROM a) t JOIN b ON 1"),
+            {"a", "b"})
+        self.assertEqual(
+            cache.tables_in("SELECT * FROM users WHERE name = 'from x, y'"),
+            {"users"})
+        self.assertEqual(cache.tables_in("SELECT 1"), {cache.ANY_TABLE})
+
+
+class TestQueryCache(unittest.TestCase):
+    """Tests for QueryCache bounds, expiry and invalidation."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted past max_entries."""
+        query_cache = cache.QueryCache(max_entries=2)
+        a, b, c = (cache.make_key(f"SELECT * FROM {t}") for t in "abc")
+        query_cache.set(a, 1)
+        query_cache.set(b, 2)
+        query_cache.get(a)
+        query_cache.set(c, 3)
+        self.assertEqual(query_cache.get(b), (False, None))
+        self.assertEqual(query_cache.get(a), (True, 1))
+        self.assertEqual(query_cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Entries are misses once their TTL has passed."""
+        query_cache = cache.QueryCache(ttl=0.05)
+        key = cache.make_key("SELECT * FROM users")
+        query_cache.set(key, [1])
+        self.assertEqual(query_cache.get(key), (True, [1]))
+        time.sleep(0.1)
+        self.assertEqual(query_cache.get(key), (False, None))
+        self.assertEqual(query_cache.stats()["expirations"], 1)
+
+    def test_write_invalidates_tables_read(self):
+        """A write drops the entries reading that table, and only those."""
+        query_cache = cache.QueryCache()
+        joined = cache.make_key("SELECT * FROM users u, orders o")
+        other = cache.make_key("SELECT * FROM products")
+        query_cache.set(joined, 1)
+        query_cache.set(other, 2)
+        cache.invalidate_for_statements(["INSERT INTO orders VALUES (1)"])
+        self.assertEqual(query_cache.get(joined), (False, None))
+        self.assertEqual(query_cache.get(other), (True, 2))
+
+    def test_unparsable_write_clears_everything(self):
+        """A write whose table cannot be told invalidates every entry."""
+        query_cache = cache.QueryCache()
+        query_cache.set(cache.make_key("SELECT * FROM products"), 1)
+        cache.invalidate_for_statements(["DELETE FROM (x)"])
+        self.assertEqual(len(query_cache), 0)
+
+
+class TestGetOrCompute(unittest.TestCase):
+    """Tests for QueryCache.get_or_compute()."""
+
+    def run_concurrently(self, target, count):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_misses_are_coalesced(self):
+        """Only one of many concurrent callers runs the query."""
+        query_cache = cache.QueryCache()
+        key = cache.make_key("SELECT * FROM users")
+        calls, statuses = [], []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return [1]
+
+        self.run_concurrently(
+            lambda: statuses.append(query_cache.get_or_compute(key, compute)), 10)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(status for status, _ in statuses),
+                         ["coalesced"] * 9 + ["miss"])
+        self.assertTrue(all(result == [1] for _, result in statuses))
+        stats = query_cache.stats()
+        self.assertEqual((stats["misses"], stats["coalesced"]), (1, 9))
+        self.assertEqual(query_cache.get_or_compute(key, compute), ("hit", [1]))
+        self.assertEqual(query_cache.stats()["hits"], 1)
+
+    def test_error_reaches_every_waiter(self):
+        """The leader's exception is raised in every coalesced caller."""
+        query_cache = cache.QueryCache()
+        key = cache.make_key("SELECT * FROM users")
+        errors = []
+
+        def compute():
+            time.sleep(0.1)
+            raise ValueError("boom")
+
+        def call():
+            try:
+                query_cache.get_or_compute(key, compute)
+            except ValueError as error:
+                errors.append(error)
+
+        self.run_concurrently(call, 5)
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(query_cache.stats()["in_flight"], 0)
+        self.assertEqual(query_cache.get(key), (False, None))
+
+    def test_invalidation_during_compute_is_not_cached(self):
+        """A result computed across a write to its table is not stored."""
+        query_cache = cache.QueryCache()
+        key = cache.make_key("SELECT * FROM users")
+
+        def compute():
+            query_cache.invalidate_tables({"users"})
+            return "stale"
+
+        self.assertEqual(query_cache.get_or_compute(key, compute), ("miss", "stale"))
+        self.assertEqual(query_cache.get(key), (False, None))
+
+    def test_unrelated_invalidation_during_compute_is_cached(self):
+        """A write to another table does not stop the result being stored."""
+        query_cache = cache.QueryCache()
+        key = cache.make_key("SELECT * FROM users")
+
+        def compute():
+            query_cache.invalidate_tables({"orders"})
+            return "fresh"
+
+        query_cache.get_or_compute(key, compute)
+        self.assertEqual(query_cache.get(key), (True, "fresh"))
+
+
+class TestSharedStore(unittest.TestCase):
+    """Two QueryCaches on one SQLite file, standing in for two workers."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "query_cache.db")
+        self.worker_a = cache.QueryCache(store=cache_stores.SQLiteStore(path))
+        self.worker_b = cache.QueryCache(store=cache_stores.SQLiteStore(path))
+
+    def tearDown(self):
+        self.worker_a.close()
+        self.worker_b.close()
+        self.directory.cleanup()
+
+    def test_results_are_shared(self):
+        """A result cached by one worker is a hit in the other."""
+        key = cache.make_key("SELECT * FROM users WHERE id = ?", (1,))
+        self.worker_a.set(key, [(1, "Alice")])
+        self.assertEqual(self.worker_b.get(key), (True, [(1, "Alice")]))
+
+    def test_invalidation_reaches_other_worker(self):
+        """A write invalidated by one worker drops the shared entry."""
+        key = cache.make_key("SELECT * FROM users")
+        self.worker_b.set(key, [1])
+        self.worker_a.invalidate_tables({"users"})
+        self.assertEqual(self.worker_b.get(key), (False, None))
+
+    def test_write_in_other_worker_during_compute(self):
+        """A result computed across another worker's write is not stored."""
+        key = cache.make_key("SELECT * FROM users")
+
+        def compute():
+            self.worker_a.invalidate_tables({"users"})
+            return "stale"
+
+        self.worker_b.get_or_compute(key, compute)
+        self.assertEqual(self.worker_a.get(key), (False, None))
+        self.assertEqual(self.worker_b.get(key), (False, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the db_pool and async_db_pool modules.
+
+Classes:
+    TestSQLitePool: thread-safe pool timeout, wake-up, reaping and pre-ping
+    TestAsyncSQLitePool: the same behaviour for the aiosqlite pool
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import async_db_pool
+import db_pool
+
+
+class TestSQLitePool(unittest.TestCase):
+    """Tests for db_pool.SQLitePool."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "users.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_connections_are_reused(self):
+        """A thread gets its previous connection back instead of a new one."""
+        pool = db_pool.SQLitePool(self.database, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(second, first)
+        stats = pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["affinity_hits"], 1)
+        pool.close()
+
+    def test_timeout_when_exhausted(self):
+        """acquire() raises TimeoutError once every connection is out."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        held = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire(timeout=0.1)
+        pool.release(held)
+        pool.close()
+
+    def test_release_wakes_waiter(self):
+        """A caller blocked on a full pool gets the released connection."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        held = pool.acquire()
+        threading.Timer(0.1, pool.release, (held,)).start()
+        start = time.monotonic()
+        conn = pool.acquire(timeout=3)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIs(conn, held)
+        pool.release(conn)
+        pool.close()
+
+    def test_discard_wakes_waiter(self):
+        """Discarding a broken connection frees its slot for a waiter."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        held = pool.acquire()
+
+        def discard():
+            held.close()  # release() finds it unusable and drops it
+            pool.release(held)
+
+        threading.Timer(0.1, discard).start()
+        start = time.monotonic()
+        conn = pool.acquire(timeout=3)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIsNot(conn, held)
+        self.assertEqual(conn.execute("SELECT 1").fetchone(), (1,))
+        pool.release(conn)
+        self.assertEqual(pool.stats()["open"], 1)
+        pool.close()
+
+    def test_idle_connections_are_reaped(self):
+        """Connections idle past idle_timeout are closed and replaced."""
+        pool = db_pool.SQLitePool(self.database, max_size=2, idle_timeout=0.05)
+        with pool.connection() as first:
+            pass
+        time.sleep(0.1)
+        with pool.connection() as second:
+            self.assertIsNot(second, first)
+        stats = pool.stats()
+        self.assertEqual(stats["closed"], 1)
+        self.assertEqual(stats["open"], 1)
+        pool.close()
+
+    def test_pre_ping_replaces_dead_connection(self):
+        """A connection that stopped working while idle is replaced."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        with pool.connection() as first:
+            pass
+        first.close()
+        with pool.connection() as second:
+            self.assertIsNot(second, first)
+            self.assertEqual(second.execute("SELECT 1").fetchone(), (1,))
+        self.assertEqual(pool.stats()["ping_failures"], 1)
+        pool.close()
+
+    def test_release_rolls_back(self):
+        """An open transaction is rolled back when the connection returns."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.commit()
+            conn.execute("INSERT INTO t VALUES (1)")
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone(), (0,))
+        pool.close()
+
+
+class TestAsyncSQLitePool(unittest.TestCase):
+    """Tests for async_db_pool.AsyncSQLitePool."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "users.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_with_pool(self, test, **options):
+        async def main():
+            pool = async_db_pool.AsyncSQLitePool(self.database, **options)
+            try:
+                await test(pool)
+            finally:
+                await pool.close()
+        asyncio.run(main())
+
+    def test_connections_are_reused(self):
+        """A released connection is handed out again."""
+        async def test(pool):
+            async with pool.connection() as first:
+                pass
+            async with pool.connection() as second:
+                self.assertIs(second, first)
+            self.assertEqual(pool.stats()["created"], 1)
+        self.run_with_pool(test, max_size=2)
+
+    def test_timeout_when_exhausted(self):
+        """acquire() raises TimeoutError once every connection is out."""
+        async def test(pool):
+            held = await pool.acquire()
+            with self.assertRaises(TimeoutError):
+                await pool.acquire(timeout=0.1)
+            await pool.release(held)
+        self.run_with_pool(test, max_size=1)
+
+    def test_discard_wakes_waiter(self):
+        """Discarding a broken connection frees its slot for a waiter."""
+        async def test(pool):
+            held = await pool.acquire()
+
+            async def discard():
+                await asyncio.sleep(0.1)
+                await held.close()
+                await pool.release(held)
+
+            start = time.monotonic()
+            conn, _ = await asyncio.gather(pool.acquire(timeout=3), discard())
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertIsNot(conn, held)
+            self.assertEqual(await conn.execute_fetchall("SELECT 1"), [(1,)])
+            await pool.release(conn)
+            self.assertEqual(pool.stats()["open"], 1)
+        self.run_with_pool(test, max_size=1)
+
+    def test_idle_connections_are_reaped(self):
+        """Connections idle past idle_timeout are closed and replaced."""
+        async def test(pool):
+            async with pool.connection() as first:
+                pass
+            await asyncio.sleep(0.1)
+            async with pool.connection() as second:
+                self.assertIsNot(second, first)
+            self.assertEqual(pool.stats()["closed"], 1)
+        self.run_with_pool(test, max_size=2, idle_timeout=0.05)
+
+    def test_pre_ping_replaces_dead_connection(self):
+        """A connection that stopped working while idle is replaced."""
+        async def test(pool):
+            async with pool.connection() as first:
+                pass
+            await first.close()
+            async with pool.connection() as second:
+                self.assertIsNot(second, first)
+            self.assertEqual(pool.stats()["ping_failures"], 1)
+        self.run_with_pool(test, max_size=1)
+
+    def test_concurrent_calls_share_the_pool(self):
+        """Many concurrent decorated calls never open more than max_size."""
+        async def test(pool):
+            async def query(n):
+                async with pool.connection() as conn:
+                    return (await conn.execute_fetchall("SELECT ?", (n,)))[0][0]
+            results = await asyncio.gather(*(query(n) for n in range(50)))
+            self.assertEqual(results, list(range(50)))
+            self.assertLessEqual(pool.stats()["created"], 3)
+        self.run_with_pool(test, max_size=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,27 +1,117 @@
-import mysql.connector
+import json
+import os
 
-def stream_users():
+seed = __import__('seed')
+row_factories = __import__('row_factories')
+backends = __import__('backends')
+
+
+def stream_users(buffered=False, fetch_size=1000, row_factory=None):
     """
     Generator that streams rows from the user_data table one by one.
     Uses a single loop and the yield keyword.
+
+    Args:
+        buffered (bool): Load the whole result set before the first row.
+            The default unbuffered cursor keeps memory flat.
+        fetch_size (int): Rows read from the server per round trip.
+        row_factory: How rows are built (see row_factories), dicts by default.
+    """
+    connection = seed.connect_to_prodev()
+    try:
+        # Single loop - yield one row at a time
+        for row in seed.stream_query(connection, "SELECT * FROM user_data;",
+                                     buffered=buffered, fetch_size=fetch_size,
+                                     row_factory=row_factory):
+            yield row
+    finally:
+        connection.close()
+
+
+def stream_users_in_range(low=None, high=None, fetch_size=1000, row_factory=None,
+                          after=None):
+    """
+    Generator that streams the users whose user_id is in [low, high),
+    ordered by user_id. A bound of None leaves that side open; `after`
+    additionally skips everything up to and including that user_id, so a
+    stream can be reopened where it left off.
+    """
+    encode_id = backends.get_backend().encode_id
+    conditions, params = [], []
+    if low is not None:
+        conditions.append("user_id >= %s")
+        params.append(encode_id(low))
+    if after is not None:
+        conditions.append("user_id > %s")
+        params.append(encode_id(after))
+    if high is not None:
+        conditions.append("user_id < %s")
+        params.append(encode_id(high))
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+    connection = seed.connect_to_prodev()
+    try:
+        for row in seed.stream_query(
+                connection, f"SELECT * FROM user_data {where}ORDER BY user_id",
+                params, fetch_size=fetch_size, row_factory=row_factory):
+            yield row
+    finally:
+        connection.close()
+
+
+def load_checkpoint(path):
+    """Return the (updated_at, user_id) high-water mark stored at path."""
+    try:
+        with open(path) as checkpoint:
+            mark = json.load(checkpoint)
+    except FileNotFoundError:
+        return None
+    return mark["updated_at"], mark["user_id"]
+
+
+def save_checkpoint(path, mark):
+    updated_at, user_id = mark
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as checkpoint:
+        json.dump({"updated_at": str(updated_at), "user_id": user_id}, checkpoint)
+    os.replace(tmp, path)  # atomic: a crash never leaves half a checkpoint
+
+
+def stream_changed_users(checkpoint="user_data.checkpoint", settle_seconds=1,
+                         fetch_size=1000, row_factory=None):
+    """
+    Generator that streams only the users inserted or updated since the
+    high-water mark stored in the checkpoint file, in (updated_at, user_id)
+    order. The first run streams the whole table.
+
+    The checkpoint advances after each batch the consumer has fully read, so
+    an interrupted sync resumes after the last completed batch. Rows changed
+    in the last settle_seconds are left for the next run, so a transaction
+    that commits late with an older updated_at is not skipped.
     """
-    # Connect to ALX_prodev database
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",          # change this to your MySQL username
-        password="M@shiSou9ek",  # change this to your MySQL password
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data;")
-
-    # Single loop - yield one row at a time
-    for row in cursor:
-        yield row
-
-    cursor.close()
-    connection.close()
+    backend = backends.get_backend()
+    mark = load_checkpoint(checkpoint)
+    if mark is None:
+        where, params = "", ()
+    else:
+        where = "(updated_at, user_id) > (%s, %s) AND "
+        params = (mark[0], backend.encode_id(mark[1]))
+    settled, settled_params = backend.older_than("updated_at", settle_seconds)
 
+    connection = seed.connect_to_prodev()
+    try:
+        for rows in seed.stream_query_batches(
+                connection,
+                f"SELECT * FROM user_data WHERE {where}{settled} "
+                f"ORDER BY updated_at, user_id",
+                (*params, *settled_params), fetch_size, row_factory=row_factory):
+            yield from rows
+            last = rows[-1]
+            save_checkpoint(checkpoint, tuple(
+                row_factories.row_value(last, column, seed.USER_COLUMNS)
+                for column in ("updated_at", "user_id")))
+    finally:
+        connection.close()
 
 
 # Example usage
@@ -1,44 +1,129 @@
-import mysql.connector
+from array import array
 
-def stream_users_in_batches(batch_size):
+try:
+    import numpy
+except ImportError:  # columnar batches fall back to array.array
+    numpy = None
+
+seed = __import__('seed')
+row_factories = __import__('row_factories')
+
+def stream_users_in_batches(batch_size, min_age=25, row_factory=None):
     """A generator function that yields user data in batches of a specified size.
 
+    Batches come straight from the driver with cursor.fetchmany(), and the
+    last batch is yielded even when it holds fewer than batch_size users.
+
     Args:
         batch_size (int): The number of users to include in each batch.
+        min_age (int): Only users strictly older than this are included.
+        row_factory: How rows are built (see row_factories), dicts by default.
 
     Yields:
-        list: A list of user data dictionaries, each containing 'id','name' and 'mail'.
+        list: A list of user rows, each containing 'id','name' and 'mail'.
     """
-    # Connect to ALX_prodev database
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",          # change this to your MySQL username
-        password="M@shiSou9ek",  # change this to your MySQL password
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data where age > 25")
-    batch=[]
-    for row in cursor:
-        batch.append(row)
-        if len(batch) == batch_size:
-            yield batch
-            batch = []
-                
-    cursor.close()
-    connection.close()
-    
-
-def batch_processing(batch_size):
+    connection = seed.connect_to_prodev()
+    try:
+        yield from seed.stream_query_batches(
+            connection, "SELECT * FROM user_data WHERE age > %s", (min_age,),
+            batch_size, row_factory=row_factory)
+    finally:
+        connection.close()
+
+
+def stream_users_in_column_batches(batch_size, min_age=25):
+    """A generator function that yields user data in column-oriented batches.
+
+    Rows are fetched as plain tuples and transposed once per batch, so no
+    per-row dict is built. 'age' is a NumPy int16 array (array.array when
+    NumPy is not installed), ready for vectorized aggregation; 'user_id',
+    'name' and 'email' are lists.
+
+    Args:
+        batch_size (int): The number of users to include in each batch.
+        min_age (int): Only users strictly older than this are included.
+
+    Yields:
+        dict: column name -> column values for one batch.
+    """
+    connection = seed.connect_to_prodev()
+    try:
+        for rows in seed.stream_query_batches(
+                connection,
+                "SELECT user_id, name, email, CAST(age AS UNSIGNED) "
+                "FROM user_data WHERE age > %s", (min_age,),
+                batch_size, row_factory=row_factories.as_tuple):
+            user_ids, names, emails, ages = zip(*rows)
+            yield {
+                "user_id": list(user_ids),
+                "name": list(names),
+                "email": list(emails),
+                "age": (numpy.array(ages, dtype=numpy.int16) if numpy
+                        else array("h", ages)),
+            }
+    finally:
+        connection.close()
+
+
+def filtered_users(batch_size, min_age=25, row_factory=None):
+    """A generator function that yields filtered users one at a time.
+
+    Only one batch is held in memory at any time.
+
+    Args:
+        batch_size (int): The number of users fetched per batch.
+        min_age (int): Only users strictly older than this are included.
+        row_factory: How rows are built (see row_factories), dicts by default.
+    """
+    for batch in stream_users_in_batches(batch_size, min_age, row_factory):
+        yield from batch
+
+
+def batch_processing(batch_size, min_age=25, sink=None, quiet=False):
     """Proccesses and print user data in batches to filter users over the age of25.
-    
+
+    Without a sink every user is printed and collected into the returned list.
+    With a sink every user is handed to sink(user) instead and nothing is
+    kept, so memory stays bounded to one batch; the number of users is
+    returned.
+
     Args:
         batch_size (int): The number of users to include in each batch.
+        min_age (int): Only users strictly older than this are included.
+        sink (callable): Called with each filtered user.
+        quiet (bool): Skip the per-user print.
     """
+    if sink is not None:
+        count = 0
+        for user in filtered_users(batch_size, min_age):
+            if not quiet:
+                print(user)
+            sink(user)
+            count += 1
+        return count
+
     users = []
-    for batch in stream_users_in_batches(batch_size):
-        for user in batch:
+    for user in filtered_users(batch_size, min_age):
+        if not quiet:
+            print(user)
+        users.append(user)
+
+    return users
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream users older than min_age")
+    parser.add_argument("batch_size", type=int, nargs="?", default=1000)
+    parser.add_argument("--min-age", type=int, default=25)
+    parser.add_argument("--quiet", action="store_true",
+                        help="only print the number of users")
+    args = parser.parse_args()
+
+    if args.quiet:
+        count = sum(1 for _ in filtered_users(args.batch_size, args.min_age))
+        print(count)
+    else:
+        for user in filtered_users(args.batch_size, args.min_age):
             print(user)
-            users.append(user)
-    
-    return users
\ No newline at end of file
@@ -1,20 +1,99 @@
 #!/usr/bin/python3
+import base64
+import json
 seed = __import__('seed')
+row_factories = __import__('row_factories')
+backends = __import__('backends')
+
+# Indexed columns lazy_pagination can seek on. Non-unique columns are
+# paired with user_id so every row has a distinct position.
+INDEXED_COLUMNS = ("user_id", "email", "age")
 
 
 def paginate_users(page_size, offset):
     connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
+    rows = list(seed.stream_query(
+        connection, "SELECT * FROM user_data LIMIT %s OFFSET %s",
+        (page_size, offset), buffered=True))
     connection.close()
     return rows
 
-def lazy_pagination(page_size):
-    offset = 0
-    while True:
-        users = paginate_users(page_size,offset)
-        if not users:
-            break
-        yield users
-        offset += page_size
+
+def _sort_key(order_by):
+    if order_by not in INDEXED_COLUMNS:
+        raise ValueError(f"Cannot paginate on non-indexed column {order_by!r}")
+    return (order_by,) if order_by == "user_id" else (order_by, "user_id")
+
+
+def paginate_users_after(connection, page_size, order_by="user_id", after=None,
+                         row_factory=None):
+    """
+    Fetch the page of users that comes right after the key `after`
+    (a tuple of sort key values, None for the first page).
+    Seeks on the index instead of skipping rows with OFFSET.
+    """
+    key = _sort_key(order_by)
+    columns = ", ".join(key)
+    if after is None:
+        query = f"SELECT * FROM user_data ORDER BY {columns} LIMIT %s"
+        params = (page_size,)
+    else:
+        placeholders = ", ".join(["%s"] * len(key))
+        query = (f"SELECT * FROM user_data WHERE ({columns}) > ({placeholders}) "
+                 f"ORDER BY {columns} LIMIT %s")
+        params = (*key_params(after), page_size)
+    return list(seed.stream_query(connection, query, params, buffered=True,
+                                  fetch_size=page_size, row_factory=row_factory))
+
+
+def key_params(after):
+    """Query parameters for a sort key; it always ends with user_id."""
+    return (*after[:-1], backends.get_backend().encode_id(after[-1]))
+
+
+def _page_key(page, order_by):
+    return tuple(row_factories.row_value(page[-1], column, seed.USER_COLUMNS)
+                 for column in _sort_key(order_by))
+
+
+def page_token(page, order_by="user_id"):
+    """
+    Return a cursor token for the last row of `page`.
+    Pass it back to lazy_pagination to resume after that page.
+    """
+    values = [str(value) for value in _page_key(page, order_by)]
+    payload = json.dumps({"order_by": order_by, "after": values})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_token(token, order_by):
+    payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if payload["order_by"] != order_by:
+        raise ValueError(
+            f"Token was issued for order_by={payload['order_by']!r}, "
+            f"not {order_by!r}")
+    return tuple(payload["after"])
+
+
+def lazy_pagination(page_size, order_by="user_id", token=None, row_factory=None):
+    """
+    Generator that lazily yields pages of users using keyset pagination.
+
+    Args:
+        page_size (int): The number of users in each page.
+        order_by (str): Indexed column to paginate on.
+        token (str): Cursor token from page_token() to resume after.
+        row_factory: How rows are built (see row_factories), dicts by default.
+    """
+    after = _decode_token(token, order_by) if token else None
+    connection = seed.connect_to_prodev()
+    try:
+        while True:
+            users = paginate_users_after(connection, page_size, order_by, after,
+                                         row_factory)
+            if not users:
+                break
+            yield users
+            after = _page_key(users, order_by)
+    finally:
+        connection.close()
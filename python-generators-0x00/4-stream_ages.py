@@ -1,20 +1,136 @@
+import random
+
+
 def stream_user_ages():
     """
     Generator that yields user age one by one from the table user_data.    
     """
     seed = __import__('seed')
+    row_factories = __import__('row_factories')
     connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT age FROM user_data")
-    for row in cursor:
-        yield row['age']
-    connection.close()
+    try:
+        # Plain tuples: no dict is built just to read one column
+        for (age,) in seed.stream_query(connection, "SELECT age FROM user_data",
+                                        row_factory=row_factories.as_tuple):
+            yield age
+    finally:
+        connection.close()
 
-if __name__ == "__main__":
-    total_ages = 0
-    count = 0
+
+def user_age_stats(bucket_width=10):
+    """
+    Compute age statistics inside the database.
+
+    COUNT, AVG, MIN, MAX, VAR_SAMP and the histogram are aggregated by MySQL,
+    so only a handful of values cross the wire whatever the table size.
+
+    Returns:
+        dict: count, mean, min, max, variance and histogram
+        ({bucket start: count} for buckets of bucket_width years).
+    """
+    seed = __import__('seed')
+    row_factories = __import__('row_factories')
+    connection = seed.connect_to_prodev()
+    try:
+        (count, mean, low, high, variance), = seed.stream_query(
+            connection,
+            "SELECT COUNT(age), AVG(age), MIN(age), MAX(age), VAR_SAMP(age) "
+            "FROM user_data",
+            row_factory=row_factories.as_tuple)
+        buckets = seed.stream_query(
+            connection,
+            "SELECT FLOOR(age / %s) * %s AS bucket, COUNT(*) FROM user_data "
+            "GROUP BY bucket ORDER BY bucket",
+            (bucket_width, bucket_width),
+            row_factory=row_factories.as_tuple)
+        histogram = {int(bucket): total for bucket, total in buckets}
+    finally:
+        connection.close()
+
+    return {
+        "count": count,
+        "mean": float(mean) if count else None,
+        "min": low,
+        "max": high,
+        "variance": float(variance) if count > 1 else None,
+        "histogram": histogram,
+    }
+
+
+class OnlineStats:
+    """
+    One-pass statistics over a stream of numbers.
+
+    Mean and variance use Welford's algorithm; quantiles are estimated from a
+    fixed-size uniform reservoir sample, so memory does not grow with the
+    number of values.
+    """
+
+    def __init__(self, bucket_width=10, sample_size=10000):
+        self.bucket_width = bucket_width
+        self.sample_size = sample_size
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+        self._sample = []
+        self._random = random.Random(0)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        bucket = int(value // self.bucket_width) * self.bucket_width
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+        if len(self._sample) < self.sample_size:
+            self._sample.append(value)
+        else:
+            i = self._random.randrange(self.count)
+            if i < self.sample_size:
+                self._sample[i] = value
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1) of the values seen so far."""
+        if not self._sample:
+            return None
+        ordered = sorted(self._sample)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def as_dict(self, quantiles=(0.25, 0.5, 0.75)):
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "variance": self.variance,
+            "histogram": dict(sorted(self.histogram.items())),
+            "quantiles": {q: self.quantile(q) for q in quantiles},
+        }
+
+
+def stream_age_stats(bucket_width=10, sample_size=10000):
+    """
+    Streaming fallback for user_age_stats(): one pass over stream_user_ages()
+    with OnlineStats. Also returns approximate quartiles.
+    """
+    stats = OnlineStats(bucket_width, sample_size)
     for age in stream_user_ages():
-        total_ages += age
-        count += 1
-    average_age = total_ages / count
-    print(f"Average age of users: {average_age}")
\ No newline at end of file
+        stats.add(age)
+    return stats.as_dict()
+
+
+if __name__ == "__main__":
+    stats = user_age_stats()
+    print(f"Average age of users: {stats['mean']}")
@@ -0,0 +1,152 @@
+"""
+Async generator counterparts of the user_data streaming functions.
+
+Built on aiomysql with one connection pool per event loop, so an asyncio
+service can interleave many scans. Rows are read through unbuffered
+server-side (SS) cursors, fetched in bounded batches, and built with the
+same row factories as the sync generators.
+"""
+import asyncio
+import os
+
+import aiomysql
+
+pool = __import__('pool')
+seed = __import__('seed')
+row_factories = __import__('row_factories')
+lazy_paginate = __import__('2-lazy_paginate')
+
+_pools = {}  # event loop -> task creating (then holding) its pool
+
+
+async def _create_pool():
+    config = pool.db_config()
+    config["db"] = config.pop("database")
+    return await aiomysql.create_pool(
+        minsize=1,
+        maxsize=int(os.environ.get("ALX_DB_POOL_SIZE", "5")),
+        **config)
+
+
+async def get_pool():
+    """Return the aiomysql pool of the running event loop, creating it."""
+    loop = asyncio.get_running_loop()
+    # Concurrent first callers all await the same creation task, so the
+    # loop only ever gets one pool
+    creating = _pools.get(loop)
+    if creating is None:
+        creating = _pools[loop] = loop.create_task(_create_pool())
+    try:
+        return await asyncio.shield(creating)
+    except Exception:
+        if _pools.get(loop) is creating:
+            del _pools[loop]  # let the next caller retry
+        raise
+
+
+async def close_pool():
+    """Close the pool of the running event loop."""
+    creating = _pools.pop(asyncio.get_running_loop(), None)
+    if creating is not None:
+        db_pool = await creating
+        db_pool.close()
+        await db_pool.wait_closed()
+
+
+async def stream_query_batches(query, params=None, batch_size=1000,
+                               row_factory=None):
+    """
+    Async generator that yields the rows of `query` in lists of at most
+    batch_size rows (see seed.stream_query_batches).
+    """
+    db_pool = await get_pool()
+    async with db_pool.acquire() as connection:
+        finished = False
+        cursor = await connection.cursor(aiomysql.SSCursor)
+        try:
+            await cursor.execute(query, params)
+            columns = tuple(column[0] for column in cursor.description)
+            convert = seed.row_converter(columns, row_factory)
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if convert is not None:
+                    rows = list(map(convert, rows))
+                yield rows
+            finished = True
+        finally:
+            if finished:
+                await cursor.close()
+            else:
+                # Closing an SS cursor drains the rest of the result;
+                # dropping the connection is cheaper.
+                connection.close()
+
+
+async def stream_query(query, params=None, fetch_size=1000, row_factory=None):
+    """Async generator that yields the rows of `query` one at a time."""
+    async for rows in stream_query_batches(query, params, fetch_size,
+                                           row_factory):
+        for row in rows:
+            yield row
+
+
+async def stream_users(fetch_size=1000, row_factory=None):
+    """Async version of 0-stream_users.stream_users()."""
+    async for row in stream_query("SELECT * FROM user_data", None, fetch_size,
+                                  row_factory):
+        yield row
+
+
+async def stream_users_in_batches(batch_size, min_age=25, row_factory=None):
+    """Async version of 1-batch_processing.stream_users_in_batches()."""
+    async for batch in stream_query_batches(
+            "SELECT * FROM user_data WHERE age > %s", (min_age,), batch_size,
+            row_factory):
+        yield batch
+
+
+async def lazy_pagination(page_size, order_by="user_id", token=None,
+                          row_factory=None):
+    """
+    Async version of 2-lazy_paginate.lazy_pagination(): keyset pages over one
+    pooled connection, resumable with tokens from page_token().
+    """
+    key = lazy_paginate._sort_key(order_by)
+    columns = ", ".join(key)
+    placeholders = ", ".join(["%s"] * len(key))
+    after = lazy_paginate._decode_token(token, order_by) if token else None
+
+    db_pool = await get_pool()
+    async with db_pool.acquire() as connection:
+        while True:
+            if after is None:
+                query = f"SELECT * FROM user_data ORDER BY {columns} LIMIT %s"
+                params = (page_size,)
+            else:
+                query = (f"SELECT * FROM user_data "
+                         f"WHERE ({columns}) > ({placeholders}) "
+                         f"ORDER BY {columns} LIMIT %s")
+                params = (*lazy_paginate.key_params(after), page_size)
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params)
+                names = tuple(column[0] for column in cursor.description)
+                convert = seed.row_converter(names, row_factory)
+                users = await cursor.fetchall()
+            if not users:
+                break
+            if convert is not None:
+                users = list(map(convert, users))
+            yield users
+            after = lazy_paginate._page_key(users, order_by)
+
+
+page_token = lazy_paginate.page_token
+
+
+async def stream_user_ages():
+    """Async version of 4-stream_ages.stream_user_ages()."""
+    async for (age,) in stream_query("SELECT age FROM user_data",
+                                     row_factory=row_factories.as_tuple):
+        yield age
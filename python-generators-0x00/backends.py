@@ -0,0 +1,434 @@
+"""
+Database backends for the generator pipeline.
+
+Every query in the package is written once, with %s placeholders and the
+mysql.connector cursor API (cursor(buffered=...), column_names, fetchmany).
+A backend opens connections that accept exactly that, and supplies the few
+statements whose syntax differs between engines (DDL, upserts, clock
+arithmetic), so the same streaming, pagination and batching code runs on
+MySQL in production and on SQLite for fast local and CI runs.
+
+The backend is chosen with ALX_DB_BACKEND=mysql (default) or sqlite;
+the SQLite database file is ALX_DB_PATH. ALX_DB_UUID_STORAGE=binary stores
+user_id as 16 raw bytes instead of a 36-character string; rows and query
+parameters still carry the usual string form.
+"""
+import os
+import re
+import sqlite3
+import threading
+import uuid
+
+UUID_STORAGE = ("char", "binary")
+
+
+class Backend:
+    """What MySQLBackend and SQLiteBackend have in common: user_id storage."""
+    char_id_type = "CHAR(36)"
+    binary_id_type = "BINARY(16)"
+    text_columns = ("name", "email")
+    # Collation that orders text by code point, as Python compares str,
+    # where the default collation does not
+    binary_collation = None
+
+    def __init__(self, uuid_storage=None):
+        uuid_storage = uuid_storage or os.environ.get("ALX_DB_UUID_STORAGE", "char")
+        if uuid_storage not in UUID_STORAGE:
+            raise ValueError(f"Unknown uuid storage {uuid_storage!r}, "
+                             f"expected one of {UUID_STORAGE}")
+        self.binary_ids = uuid_storage == "binary"
+
+    @property
+    def id_type(self):
+        return self.binary_id_type if self.binary_ids else self.char_id_type
+
+    def encode_id(self, value):
+        """
+        Turn a user_id (or a hex prefix of one, as used for range bounds)
+        into the stored form.
+        """
+        if not self.binary_ids or not isinstance(value, str):
+            return value
+        if len(value) == 36:
+            return uuid.UUID(value).bytes
+        return bytes.fromhex(value.replace("-", ""))
+
+    def decode_row(self, columns):
+        """Row converter turning a stored user_id back into a string, or None."""
+        if not self.binary_ids or "user_id" not in columns:
+            return None
+        i = columns.index("user_id")
+
+        def decode(row):
+            if row[i] is None:
+                return row
+            return (*row[:i], str(uuid.UUID(bytes=bytes(row[i]))), *row[i + 1:])
+        return decode
+
+    def codepoint_order(self, column):
+        """ORDER BY term that sorts `column` the way Python compares its values."""
+        text = column in self.text_columns or (column == "user_id"
+                                               and not self.binary_ids)
+        if text and self.binary_collation:
+            return f"{column} COLLATE {self.binary_collation}"
+        return column
+
+
+class MySQLBackend(Backend):
+    name = "mysql"
+    # utf8mb4_0900_ai_ci is case- and accent-insensitive
+    binary_collation = "utf8mb4_bin"
+
+    def __init__(self, uuid_storage=None):
+        super().__init__(uuid_storage)
+        import mysql.connector
+        self._driver = mysql.connector
+        self.Error = mysql.connector.Error
+
+    def connect(self, **config):
+        return self._driver.connect(**config)
+
+    def create_database(self, connection, name):
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {name}")
+        cursor.close()
+
+    # InnoDB secondary indexes carry the primary key, so:
+    #   idx_age            (age, user_id)  SELECT age scans, keyset on age
+    #   idx_updated_at     (updated_at, user_id) incremental sync
+    indexes = {
+        "idx_age": "INDEX idx_age (age)",
+        "idx_updated_at": "INDEX idx_updated_at (updated_at, user_id)",
+    }
+    # The primary key already indexes user_id; idx_age_name_email repeated
+    # idx_age as its prefix and slowed bulk loads with two VARCHAR columns
+    redundant_indexes = ("idx_user_id", "idx_age_name_email")
+
+    @property
+    def schema(self):
+        return (
+            f"""
+            CREATE TABLE IF NOT EXISTS user_data (
+                user_id {self.id_type} PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                email VARCHAR(255) NOT NULL UNIQUE,
+                age DECIMAL(3,0) NOT NULL,
+                updated_at TIMESTAMP(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+                {", ".join(self.indexes.values())}
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS seed_chunks (
+                chunk_hash CHAR(64) PRIMARY KEY,
+                rows_loaded INT NOT NULL,
+                loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+
+    def has_column(self, cursor, table, column):
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+            AND table_name = %s AND column_name = %s
+        """, (table, column))
+        (count,) = cursor.fetchone()
+        return bool(count)
+
+    def index_names(self, cursor, table):
+        cursor.execute("""
+            SELECT DISTINCT index_name FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """, (table,))
+        return {name for (name,) in cursor.fetchall()}
+
+    def index_migrations(self, existing):
+        """Statements bringing user_data's indexes up to date."""
+        changes = [f"DROP INDEX {name}" for name in self.redundant_indexes
+                   if name in existing]
+        changes += [f"ADD {definition}" for name, definition in self.indexes.items()
+                    if name not in existing]
+        return [f"ALTER TABLE user_data {', '.join(changes)}"] if changes else []
+
+    def explain(self, cursor, query, params=None):
+        """Indexes the plan for query uses, or None for a full table scan."""
+        cursor.execute(f"EXPLAIN {query}", params)
+        rows = [dict(zip(cursor.column_names, row)) for row in cursor.fetchall()]
+        used = []
+        for row in rows:
+            key = row.get("key")
+            if key:
+                extra = row.get("Extra") or ""
+                used.append(f"{key} (covering)" if "Using index" in extra else key)
+        return used or None
+
+    change_tracking = (
+        """
+        ALTER TABLE user_data
+        ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+            DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        """,
+    )
+
+    def upsert_users(self, count):
+        values = ", ".join(["(%s, %s, %s, %s)"] * count)
+        return f"""
+            INSERT INTO user_data (user_id, name, email, age)
+            VALUES {values}
+            ON DUPLICATE KEY UPDATE
+            name=VALUES(name), age=VALUES(age)
+        """
+
+    def insert_ignore(self, table, columns):
+        placeholders = ", ".join(["%s"] * len(columns))
+        return (f"INSERT IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({placeholders})")
+
+    def older_than(self, column, seconds):
+        """Condition and params for `column` being at least `seconds` old."""
+        return f"{column} < NOW(6) - INTERVAL %s SECOND", (seconds,)
+
+
+class _VarSamp:
+    """VAR_SAMP aggregate (Welford), which SQLite does not provide."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+
+def sqlite_placeholders(query):
+    """
+    Rewrite a mysql.connector query for sqlite3: %s placeholders become ?
+    and %% becomes %, while '%s' inside a string literal is left as written.
+    """
+    parts = _QUOTED.split(query)
+    # Odd parts are the quoted literals: only the %% escape applies there
+    parts[::2] = [_PLACEHOLDER.sub(lambda m: "?" if m.group() == "%s" else "%",
+                                   part) for part in parts[::2]]
+    parts[1::2] = [part.replace("%%", "%") for part in parts[1::2]]
+    return "".join(parts)
+
+
+class SQLiteCursor:
+    """sqlite3 cursor with the mysql.connector cursor interface."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.column_names = ()
+
+    def execute(self, query, params=None):
+        # As with the MySQL drivers, a query without params is sent untouched
+        if params is not None:
+            query = sqlite_placeholders(query)
+        self._cursor.execute(query, tuple(params or ()))
+        self.column_names = tuple(
+            column[0] for column in self._cursor.description or ())
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    sqlite3 connection with the mysql.connector connection interface.
+    SQLite cursors step through results lazily, so every cursor streams
+    whatever `buffered` says, and never blocks the connection.
+    """
+    unread_result = False
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.create_function("FLOOR", 1,
+                                 lambda x: None if x is None else int(x // 1))
+        self._db.create_aggregate("VAR_SAMP", 1, _VarSamp)
+
+    @property
+    def in_transaction(self):
+        return self._db.in_transaction
+
+    def cursor(self, buffered=False):
+        return SQLiteCursor(self._db.cursor())
+
+    def is_connected(self):
+        return True
+
+    def reconnect(self, attempts=1, delay=0):
+        pass
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def close(self):
+        self._db.close()
+
+
+# Same text format as the updated_at default, so values compare as strings
+_SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    Error = sqlite3.Error
+    binary_id_type = "BLOB"
+
+    def __init__(self, path=None, uuid_storage=None):
+        super().__init__(uuid_storage)
+        self.path = path or os.environ.get("ALX_DB_PATH", "ALX_prodev.sqlite3")
+
+    def connect(self, **config):
+        # Host and credentials do not apply to a database file
+        return SQLiteConnection(self.path)
+
+    def create_database(self, connection, name):
+        pass  # the database file is created on connect
+
+    indexes = {
+        "idx_age": "CREATE INDEX IF NOT EXISTS idx_age ON user_data (age, user_id)",
+        "idx_updated_at": "CREATE INDEX IF NOT EXISTS idx_updated_at "
+                          "ON user_data (updated_at, user_id)",
+    }
+    redundant_indexes = ("idx_age_name_email",)
+
+    # SQLite has no ON UPDATE column clause
+    updated_at_trigger = """
+        CREATE TRIGGER IF NOT EXISTS user_data_updated_at
+        AFTER UPDATE OF name, age ON user_data
+        WHEN old.name IS NOT new.name OR old.age IS NOT new.age
+        BEGIN
+            UPDATE user_data SET updated_at = %s WHERE user_id = new.user_id;
+        END
+        """ % _SQLITE_NOW
+
+    @property
+    def schema(self):
+        return (
+            f"""
+            CREATE TABLE IF NOT EXISTS user_data (
+                user_id {self.id_type} PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                email VARCHAR(255) NOT NULL UNIQUE,
+                age DECIMAL(3,0) NOT NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT ({_SQLITE_NOW})
+            )
+            """,
+            *self.indexes.values(),
+            self.updated_at_trigger,
+            """
+            CREATE TABLE IF NOT EXISTS seed_chunks (
+                chunk_hash CHAR(64) PRIMARY KEY,
+                rows_loaded INT NOT NULL,
+                loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+
+    def has_column(self, cursor, table, column):
+        cursor.execute(f"SELECT name FROM pragma_table_info('{table}')")
+        return any(name == column for (name,) in cursor.fetchall())
+
+    @property
+    def change_tracking(self):
+        return (
+            # ALTER TABLE ADD COLUMN only takes constant defaults
+            "ALTER TABLE user_data ADD COLUMN updated_at TIMESTAMP NOT NULL "
+            "DEFAULT '1970-01-01 00:00:00.000'",
+            self.indexes["idx_updated_at"],
+            self.updated_at_trigger,
+        )
+
+    def index_names(self, cursor, table):
+        cursor.execute(f"SELECT name FROM pragma_index_list('{table}')")
+        return {name for (name,) in cursor.fetchall()}
+
+    def index_migrations(self, existing):
+        changes = [f"DROP INDEX {name}" for name in self.redundant_indexes
+                   if name in existing]
+        return changes + [definition for name, definition in self.indexes.items()
+                          if name not in existing]
+
+    def explain(self, cursor, query, params=None):
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        used = []
+        for row in cursor.fetchall():
+            detail = row[-1]
+            if " USING " in detail:
+                used.append(detail.split(" USING ", 1)[1])
+        return used or None
+
+    def upsert_users(self, count):
+        values = ", ".join(["(%s, %s, %s, %s)"] * count)
+        return f"""
+            INSERT INTO user_data (user_id, name, email, age)
+            VALUES {values}
+            ON CONFLICT DO UPDATE SET
+            name=excluded.name, age=excluded.age
+        """
+
+    def insert_ignore(self, table, columns):
+        placeholders = ", ".join(["%s"] * len(columns))
+        return (f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({placeholders})")
+
+    def older_than(self, column, seconds):
+        return (f"{column} < strftime('%Y-%m-%d %H:%M:%f', 'now', %s)",
+                (f"-{seconds} seconds",))
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the package-wide backend selected by ALX_DB_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.environ.get("ALX_DB_BACKEND", "mysql")
+            try:
+                _backend = BACKENDS[name]()
+            except KeyError:
+                raise ValueError(f"Unknown ALX_DB_BACKEND {name!r}, "
+                                 f"expected one of {sorted(BACKENDS)}") from None
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the package-wide backend (e.g. SQLiteBackend(path) in tests)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
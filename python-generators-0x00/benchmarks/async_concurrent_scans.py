@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Many concurrent user_data scans on one event loop vs the same scans run
+one after the other with the sync generator.
+
+Run from the python-generators-0x00 directory:
+    python3 benchmarks/async_concurrent_scans.py 16
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+async_streams = __import__('async_streams')
+stream_users = __import__('0-stream_users')
+row_factories = __import__('row_factories')
+
+
+async def scan():
+    rows = 0
+    async for _ in async_streams.stream_users(row_factory=row_factories.as_tuple):
+        rows += 1
+    return rows
+
+
+async def concurrent(scans):
+    start = time.perf_counter()
+    rows = sum(await asyncio.gather(*(scan() for _ in range(scans))))
+    seconds = time.perf_counter() - start
+    await async_streams.close_pool()
+    return rows, seconds
+
+
+def sequential(scans):
+    start = time.perf_counter()
+    rows = 0
+    for _ in range(scans):
+        rows += sum(1 for _ in stream_users.stream_users(
+            row_factory=row_factories.as_tuple))
+    return rows, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    scans = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    for name, (rows, seconds) in (
+            ("sync sequential", sequential(scans)),
+            ("async concurrent", asyncio.run(concurrent(scans)))):
+        print(f"{name:>17}: {scans} scans, {rows} rows in {seconds:.3f}s "
+              f"({rows / seconds:.0f} rows/sec)")
@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+"""
+Throughput of stream_users_in_batches() for several batch sizes.
+
+Run from the python-generators-0x00 directory:
+    python3 benchmarks/batch_throughput.py 10 100 1000
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+processing = __import__('1-batch_processing')
+row_factories = __import__('row_factories')
+
+
+def run(batch_size, row_factory=None):
+    start = time.perf_counter()
+    rows = batches = 0
+    for batch in processing.stream_users_in_batches(batch_size, min_age=0,
+                                                    row_factory=row_factory):
+        rows += len(batch)
+        batches += 1
+    return rows, batches, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    print(f"{'batch':>7} {'factory':>9} {'rows':>9} {'batches':>8} "
+          f"{'seconds':>8} {'rows/sec':>10}")
+    for size in sizes:
+        for name in ("as_dict", "as_tuple"):
+            factory = getattr(row_factories, name)
+            rows, batches, seconds = run(size, factory)
+            print(f"{size:>7} {name:>9} {rows:>9} {batches:>8} "
+                  f"{seconds:>8.3f} {rows / seconds:>10.0f}")
@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+"""
+Benchmark harness for the generators on a local SQLite stand-in.
+
+Seeds a synthetic user_data table of the requested size (see standin.py),
+runs every generator in a fresh process and reports rows/sec, time to first
+row and peak RSS. Results are written as JSON, tagged with the current git
+commit, so runs can be compared across commits.
+
+Run from the python-generators-0x00 directory:
+    python3 benchmarks/harness.py --rows 100000 --output results.json
+    python3 benchmarks/harness.py --rows 100000 --compare results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+import standin  # noqa: E402
+
+
+def _cases():
+    # Each case returns (generator, number of rows in one yielded item)
+    stream_users = __import__('0-stream_users')
+    processing = __import__('1-batch_processing')
+    lazy_paginate = __import__('2-lazy_paginate')
+    stream_ages = __import__('4-stream_ages')
+    return {
+        "stream_users": lambda: (stream_users.stream_users(), None),
+        "stream_users_in_batches": lambda: (
+            processing.stream_users_in_batches(1000, min_age=0), len),
+        "lazy_pagination": lambda: (lazy_paginate.lazy_pagination(1000), len),
+        "stream_user_ages": lambda: (stream_ages.stream_user_ages(), None),
+    }
+
+
+CASES = ("stream_users", "stream_users_in_batches", "lazy_pagination",
+         "stream_user_ages")
+
+
+def _measure(case, db_path, queue):
+    standin.use_standin(db_path)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    generator, size = _cases()[case]()
+    rows = 0
+    first_row = None
+    for item in generator:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        rows += size(item) if size else 1
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+        "time_to_first_row": first_row,
+        "peak_rss_kb": peak,
+        "scan_rss_kb": peak - baseline,
+    })
+
+
+def run_case(case, db_path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(case, db_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows, cases=CASES):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "user_data.sqlite")
+        standin.create_synthetic(db_path, rows)
+        results = {case: run_case(case, db_path) for case in cases}
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "backend": "sqlite-standin",
+        "rows": rows,
+        "results": results,
+    }
+
+
+def report(run_result, baseline=None):
+    print(f"{'generator':>24} {'rows/sec':>10} {'first row (ms)':>15} "
+          f"{'peak RSS (MB)':>14}" + (f" {'vs baseline':>12}" if baseline else ""))
+    for case, result in run_result["results"].items():
+        line = (f"{case:>24} {result['rows_per_sec']:>10.0f} "
+                f"{result['time_to_first_row'] * 1000:>15.2f} "
+                f"{result['peak_rss_kb'] / 1024:>14.1f}")
+        if baseline and case in baseline["results"]:
+            ratio = result["rows_per_sec"] / baseline["results"][case]["rows_per_sec"]
+            line += f" {ratio:>11.2f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--case", action="append", choices=CASES,
+                        help="generator to run (default: all)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    result = run(args.rows, args.case or CASES)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,55 @@
+"""
+Local SQLite stand-in for the ALX_prodev MySQL database.
+
+create_synthetic() builds a SQLite user_data table of any size, scaled up
+from user_data.csv, with the schema of backends.SQLiteBackend. Point the
+package at it with use_standin() (or ALX_DB_BACKEND=sqlite and
+ALX_DB_PATH) and every generator runs unchanged, without a MySQL server.
+"""
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+seed = __import__('seed')
+backends = __import__('backends')
+pool = __import__('pool')
+
+
+def use_standin(path, pool_size=2):
+    """Route the package's backend and shared pool to the database at path."""
+    backends.set_backend(backends.SQLiteBackend(path))
+    pool.set_pool(pool.ConnectionPool(size=pool_size))
+
+
+def create_synthetic(path, rows, csv_path=None):
+    """
+    Create a stand-in database at path holding `rows` users, built by
+    cycling through user_data.csv and making each email unique.
+    Leaves the package pointed at it (see use_standin).
+    """
+    csv_path = csv_path or os.path.join(os.path.dirname(__file__), "..",
+                                        "user_data.csv")
+    with open(csv_path, newline="") as csvfile:
+        base = [(row["name"], row["email"], int(row["age"]))
+                for row in csv.DictReader(csvfile)]
+
+    if os.path.exists(path):
+        os.remove(path)
+    use_standin(path)
+    connection = seed.connect_to_prodev()
+    try:
+        seed.create_table(connection)
+        chunk = []
+        for i in range(rows):
+            name, email, age = base[i % len(base)]
+            email = f"{i // len(base)}.{email}"
+            chunk.append((seed.user_id_for(email), name, email, age))
+            if len(chunk) == 1000:
+                seed.insert_many(connection, chunk)
+                chunk = []
+        if chunk:
+            seed.insert_many(connection, chunk)
+        connection.commit()
+    finally:
+        connection.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""
+Peak RSS of buffered vs streaming (unbuffered) cursors against row count.
+
+Each measurement runs in a fresh process so peak RSS is not carried over.
+Run from the python-generators-0x00 directory:
+    python3 benchmarks/streaming_rss.py 1000 10000 100000
+"""
+import multiprocessing
+import os
+import resource
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+seed = __import__('seed')
+
+
+def measure(buffered, row_count, queue):
+    connection = seed.connect_to_prodev()
+    rows = 0
+    for _ in seed.stream_query(connection, "SELECT * FROM user_data LIMIT %s",
+                               (row_count,), buffered=buffered):
+        rows += 1
+    connection.close()
+    # ru_maxrss is in kilobytes on Linux
+    queue.put((rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def peak_rss(buffered, row_count):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(buffered, row_count, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print(f"{'rows':>10} {'mode':>10} {'peak RSS (MB)':>14}")
+    for count in counts:
+        for buffered in (True, False):
+            rows, rss = peak_rss(buffered, count)
+            mode = "buffered" if buffered else "streaming"
+            print(f"{rows:>10} {mode:>10} {rss / 1024:>14.1f}")
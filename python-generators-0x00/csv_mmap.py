@@ -0,0 +1,125 @@
+"""
+Memory-mapped, parallel CSV reader for large user_data.csv ingests.
+
+The file is memory-mapped and cut into byte ranges that always end on a
+record boundary: a newline outside any quoted field, found by tracking the
+parity of '"' characters (RFC 4180 escapes a quote by doubling it, so the
+parity only flips on opening/closing quotes). Each range is then parsed by
+the csv module in a worker process, so its quoting rules still apply, and
+returned as tuple chunks ready for seed.insert_many().
+"""
+import collections
+import csv
+import hashlib
+import io
+import mmap
+import multiprocessing
+
+seed = __import__('seed')
+
+_WINDOW = 1 << 20  # count quotes 1 MB at a time
+
+
+def _quote_parity(mm, start, end):
+    parity = 0
+    for lo in range(start, end, _WINDOW):
+        parity ^= mm[lo:min(lo + _WINDOW, end)].count(b'"') & 1
+    return parity
+
+
+def _next_record_end(mm, start, parity):
+    """Offset just past the first record ending at or after start."""
+    while True:
+        newline = mm.find(b"\n", start)
+        if newline == -1:
+            return len(mm)
+        parity ^= _quote_parity(mm, start, newline)
+        start = newline + 1
+        if not parity:
+            return start
+
+
+def record_ranges(mm, start, range_size):
+    """
+    Split mm[start:] into [lo, hi) ranges of whole records. Cuts are made at
+    the first record boundary after each multiple of range_size, so they do
+    not depend on `start` as long as it is itself a record boundary.
+    """
+    ranges = []
+    size = len(mm)
+    lo = start
+    while lo < size:
+        target = (lo // range_size + 1) * range_size
+        if target >= size:
+            hi = size
+        else:
+            parity = _quote_parity(mm, lo, target)
+            hi = _next_record_end(mm, target, parity)
+        ranges.append((lo, hi))
+        lo = hi
+    return ranges
+
+
+def _parse_range(task):
+    path, lo, hi, columns, chunk_size = task
+    name, email, age = columns
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[lo:hi].decode("utf-8")
+
+    chunks = []
+    chunk = []
+    digest = hashlib.sha256()
+    for row in csv.reader(io.StringIO(text, newline="")):
+        chunk.append((seed.user_id_for(row[email]), row[name], row[email], row[age]))
+        digest.update("\x1f".join(row).encode() + b"\n")
+        if len(chunk) == chunk_size:
+            chunks.append((chunk, digest.hexdigest()))
+            chunk = []
+            digest = hashlib.sha256()
+    if chunk:
+        chunks.append((chunk, digest.hexdigest()))
+    return chunks
+
+
+def read_csv_chunks_parallel(path, chunk_size=1000, offset=0, workers=4,
+                             range_size=16 << 20):
+    """
+    Generator with the same output as seed.read_csv_chunks_from(): yields
+    (chunk, end_offset, digest) from byte `offset` on, with the ranges of
+    range_size bytes parsed in `workers` processes and yielded in file order.
+    At most 2 * workers ranges are dispatched ahead of the consumer, so a
+    slow consumer bounds how many parsed ranges the parent holds.
+
+    end_offset is a safe resume point: the end of the range for its last
+    chunk, the start of the range for the others.
+    """
+    with open(path, "rb") as f:
+        if not f.read(1):
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = _next_record_end(mm, 0, 0)
+            header = next(csv.reader(io.StringIO(
+                mm[:header_end].decode("utf-8"), newline="")))
+            columns = tuple(header.index(column)
+                            for column in ("name", "email", "age"))
+            ranges = record_ranges(mm, max(offset, header_end), range_size)
+
+    ranges = iter(ranges)
+    in_flight = collections.deque()
+    with multiprocessing.Pool(workers) as workers_pool:
+        while True:
+            # Top up the window, then take the oldest range so order is kept
+            while len(in_flight) < 2 * workers:
+                lo_hi = next(ranges, None)
+                if lo_hi is None:
+                    break
+                task = (path, *lo_hi, columns, chunk_size)
+                in_flight.append(
+                    (lo_hi, workers_pool.apply_async(_parse_range, (task,))))
+            if not in_flight:
+                return
+            (lo, hi), pending = in_flight.popleft()
+            chunks = pending.get()
+            for i, (chunk, digest) in enumerate(chunks, start=1):
+                yield chunk, hi if i == len(chunks) else lo, digest
@@ -0,0 +1,87 @@
+"""
+Parallel partitioned scan of user_data.
+
+The user_id (UUID) key space is split into contiguous ranges and each range
+is streamed with stream_users_in_range() in its own worker process.
+"""
+import multiprocessing
+
+stream_users = __import__('0-stream_users')
+pool = __import__('pool')
+
+
+def partition_bounds(partitions):
+    """
+    Split the UUID key space into `partitions` [low, high) ranges of
+    8-hex-digit prefixes. The first and last ranges are open-ended.
+    """
+    space = 16 ** 8
+    cuts = [format(space * i // partitions, "08x") for i in range(1, partitions)]
+    lows = [None] + cuts
+    highs = cuts + [None]
+    return list(zip(lows, highs))
+
+
+_inherited_pools = []
+
+
+def _reset_pool():
+    # Forked workers must not use the parent's pooled sockets. They must not
+    # close or garbage-collect them either: a socket's __del__ shuts down the
+    # file descriptor it shares with the parent. So keep the inherited pool
+    # alive and install a fresh one for this worker.
+    _inherited_pools.append(pool._pool)
+    pool.set_pool(None)  # get_pool() builds a fresh one on first use
+
+
+def _scan_partition(task):
+    low, high, func, fetch_size = task
+    return func(stream_users.stream_users_in_range(low, high, fetch_size))
+
+
+def partitioned_scan(func=list, workers=4, partitions=None, ordered=False,
+                     fetch_size=1000):
+    """
+    Generator that applies func(rows) to every partition in a pool of
+    `workers` processes and yields the per-partition results.
+
+    Args:
+        func: Picklable callable taking the row iterator of one partition.
+            The default, list, returns the rows themselves.
+        workers (int): Number of worker processes.
+        partitions (int): Number of key ranges, 4 per worker by default so
+            uneven ranges still balance.
+        ordered (bool): Yield results in user_id order of their partitions.
+            Otherwise results are yielded as soon as each one finishes.
+        fetch_size (int): Rows read from the server per round trip.
+    """
+    partitions = partitions or workers * 4
+    tasks = [(low, high, func, fetch_size)
+             for low, high in partition_bounds(partitions)]
+    with multiprocessing.Pool(workers, initializer=_reset_pool) as workers_pool:
+        scan = workers_pool.imap if ordered else workers_pool.imap_unordered
+        for result in scan(_scan_partition, tasks):
+            yield result
+
+
+def count_rows(rows):
+    """Partition function that counts rows without keeping them."""
+    return sum(1 for _ in rows)
+
+
+def scan_users(workers=4, ordered=False, fetch_size=1000):
+    """Generator that yields every user, scanned by `workers` processes."""
+    for rows in partitioned_scan(list, workers, ordered=ordered,
+                                 fetch_size=fetch_size):
+        yield from rows
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for workers in [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]:
+        start = time.perf_counter()
+        total = sum(partitioned_scan(count_rows, workers))
+        print(f"{workers} workers: {total} rows in "
+              f"{time.perf_counter() - start:.3f}s")
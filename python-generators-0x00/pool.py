@@ -0,0 +1,197 @@
+"""
+Shared connection pool for the ALX_prodev generators.
+
+Credentials and sizing come from the environment:
+    ALX_DB_HOST, ALX_DB_PORT, ALX_DB_USER, ALX_DB_PASSWORD, ALX_DB_NAME,
+    ALX_DB_POOL_SIZE, ALX_DB_POOL_TIMEOUT
+"""
+import os
+import threading
+import time
+
+import backends
+
+
+def db_config(database=True):
+    """Connection arguments for the backend's connect() from the environment."""
+    config = {
+        "host": os.environ.get("ALX_DB_HOST", "localhost"),
+        "port": int(os.environ.get("ALX_DB_PORT", "3306")),
+        "user": os.environ.get("ALX_DB_USER", "root"),
+        "password": os.environ.get("ALX_DB_PASSWORD", ""),
+    }
+    if database:
+        config["database"] = os.environ.get("ALX_DB_NAME", "ALX_prodev")
+    return config
+
+
+class PooledConnection:
+    """
+    Proxy for a borrowed connection. close() hands it back to the pool
+    instead of disconnecting; everything else goes to the real connection.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of database connections.
+
+    Connections are opened lazily up to `size`; when all of them are checked
+    out, get_connection() waits up to `timeout` seconds for one to come back
+    or for a slot to free up when a broken connection is discarded.
+    Every checkout pings the connection and reconnects if it went stale.
+    Connections are opened by the backend selected in backends.py, or by
+    `connect` when it is given.
+    """
+
+    def __init__(self, size=5, timeout=30, connect=None, **config):
+        self.size = size
+        self.timeout = timeout
+        self.config = config
+        self._connect = connect
+        self._idle = []  # most recently released last
+        # Guards the counters; notified whenever a connection is returned or
+        # a slot is freed, so waiters see both
+        self._available = threading.Condition()
+        self._created = 0
+        self._checkouts = 0
+        self._in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _new_connection(self):
+        if self._connect is not None:
+            return self._connect()
+        return backends.get_backend().connect(**self.config)
+
+    def _discard(self):
+        """Give up a connection slot; caller holds the lock."""
+        self._created -= 1
+        self._available.notify()
+
+    def _checkout_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None  # caller opens a new connection
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No connection available after {timeout}s "
+                        f"(pool size {self.size})")
+                self._available.wait(remaining)
+
+    def get_connection(self, timeout=None):
+        """Borrow a connection; close() on the result returns it."""
+        start = time.perf_counter()
+        connection = self._checkout_idle(self.timeout if timeout is None else timeout)
+        try:
+            if connection is None:
+                connection = self._new_connection()
+            elif not connection.is_connected():
+                connection.reconnect(attempts=2, delay=0)
+        except Exception:
+            with self._available:
+                self._discard()
+            raise
+        waited = time.perf_counter() - start
+
+        with self._available:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        Error = backends.get_backend().Error
+        try:
+            if connection.unread_result:
+                # A generator stopped early on an unbuffered cursor; draining
+                # the rest of the result could take longer than reconnecting.
+                raise Error("unread result")
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            try:
+                connection.close()
+            except Error:
+                pass
+            with self._available:
+                self._in_use -= 1
+                self._discard()
+            return
+        with self._available:
+            self._in_use -= 1
+            self._idle.append(connection)
+            self._available.notify()
+
+    def stats(self):
+        """Checkout counts and wait times since the pool was created."""
+        with self._available:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "wait_total": self._wait_total,
+                "wait_max": self._wait_max,
+                "wait_avg": (self._wait_total / self._checkouts
+                             if self._checkouts else 0.0),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the package-wide pool, creating it from the environment."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.environ.get("ALX_DB_POOL_SIZE", "5")),
+                timeout=float(os.environ.get("ALX_DB_POOL_TIMEOUT", "30")),
+                **db_config())
+        return _pool
+
+
+def set_pool(new_pool):
+    """Replace the package-wide pool."""
+    global _pool
+    with _pool_lock:
+        _pool = new_pool
+
+
+def connect():
+    """Borrow a connection to ALX_prodev from the shared pool."""
+    return get_pool().get_connection()
+
+
+def stats():
+    return get_pool().stats()
@@ -0,0 +1,82 @@
+"""
+Prefetching wrapper for the row generators.
+
+A background thread drives the wrapped generator and hands its items to the
+consumer through a bounded queue, so database round trips overlap with the
+consumer's own work. When the queue is full the producer blocks
+(backpressure), so at most `depth` chunks are held in memory.
+
+    for user in prefetch(stream_users(), depth=4, chunk_size=500):
+        ...
+    for page in prefetch(lazy_pagination(100), depth=2):
+        ...
+"""
+import queue
+import threading
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def _produce(source, chunk_size, buffer, stop):
+    def put(item):
+        # Wake up regularly so an abandoned consumer does not hang the thread
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        chunk = []
+        for item in source:
+            chunk.append(item)
+            if len(chunk) == chunk_size:
+                if not put(chunk):
+                    return
+                chunk = []
+        if chunk and not put(chunk):
+            return
+        put(_DONE)
+    except BaseException as error:
+        put(_Failure(error))
+    finally:
+        close = getattr(source, "close", None)
+        if close is not None:
+            close()
+
+
+def prefetch(source, depth=4, chunk_size=1):
+    """
+    Generator that yields the items of `source`, produced ahead of time
+    on a background thread.
+
+    Args:
+        source: Any iterable, typically one of the package's generators.
+        depth (int): Maximum number of chunks waiting in the queue.
+        chunk_size (int): Items moved through the queue at a time. Use a few
+            hundred for per-row generators; keep 1 for page/batch generators.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce,
+                                args=(iter(source), chunk_size, buffer, stop),
+                                daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = buffer.get()
+            if chunk is _DONE:
+                break
+            if isinstance(chunk, _Failure):
+                raise chunk.error
+            yield from chunk
+    finally:
+        stop.set()
+        producer.join()
@@ -0,0 +1,79 @@
+"""
+Row factories for the user_data generators.
+
+A row factory takes the column names of a result set and returns a function
+that converts one raw row tuple, or None when the tuple is used as is.
+Every generator takes an optional row_factory argument; when it is omitted
+the package default set with set_row_factory() is used, so hot consumers can
+switch to the compact forms without touching call sites.
+"""
+
+
+class UserRecord:
+    """Compact record for a user_data row (no per-row __dict__)."""
+    __slots__ = ("user_id", "name", "email", "age", "updated_at")
+
+    def __init__(self, user_id=None, name=None, email=None, age=None,
+                 updated_at=None):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.age = age
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return (f"UserRecord(user_id={self.user_id!r}, name={self.name!r}, "
+                f"email={self.email!r}, age={self.age!r}, "
+                f"updated_at={self.updated_at!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field)
+                   for field in self.__slots__)
+
+
+def as_tuple(columns):
+    """Plain tuples straight from the driver."""
+    return None
+
+
+def as_dict(columns):
+    """One dict per row, keyed on column name (the historical default)."""
+    return lambda row: dict(zip(columns, row))
+
+
+def as_record(columns):
+    """One UserRecord per row. Columns outside user_data are dropped."""
+    indexes = [(column, i) for i, column in enumerate(columns)
+               if column in UserRecord.__slots__]
+
+    def convert(row):
+        record = UserRecord()
+        for column, i in indexes:
+            setattr(record, column, row[i])
+        return record
+    return convert
+
+
+_default_factory = as_dict
+
+
+def set_row_factory(factory):
+    """Set the row factory used when a generator is not given one."""
+    global _default_factory
+    _default_factory = factory
+
+
+def get_row_factory(factory=None):
+    """Return `factory`, or the package default when it is None."""
+    return factory or _default_factory
+
+
+def row_value(row, column, columns):
+    """Read `column` from a row built by any factory above."""
+    if isinstance(row, dict):
+        return row[column]
+    if isinstance(row, UserRecord):
+        return getattr(row, column)
+    return row[columns.index(column)]
@@ -1,52 +1,139 @@
-import mysql.connector
 import csv
 import uuid
+import hashlib
+import json
+import os
+import time
+import row_factories
+import pool
+import backends
 
 # ----------------------------
-# 1. Connect to MySQL server
+# 1. Connect to the database server
 # ----------------------------
 def connect_db():
-    return mysql.connector.connect(
-        host="localhost",   # change if needed
-        user="root",        # your MySQL username
-        password="M@shiSou9ek" # your MySQL password
-    )
+    # Credentials come from the ALX_DB_* environment variables (see pool.py),
+    # the engine from ALX_DB_BACKEND (see backends.py)
+    return backends.get_backend().connect(**pool.db_config(database=False))
 
 # ----------------------------
 # 2. Create database ALX_prodev
 # ----------------------------
 def create_database(connection):
-    cursor = connection.cursor()
-    cursor.execute("CREATE DATABASE IF NOT EXISTS ALX_prodev")
-    cursor.close()
+    backends.get_backend().create_database(connection, pool.db_config()['database'])
 
 # ----------------------------
-# 3. Connect directly to ALX_prodev
+# 3. Connect to ALX_prodev
 # ----------------------------
 def connect_to_prodev():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="M@shiSou9ek",
-        database="ALX_prodev"
-    )
+    # Borrowed from the shared pool: close() hands the connection back
+    return pool.connect()
+
+# Column order of user_data, as returned by SELECT *
+USER_COLUMNS = ("user_id", "name", "email", "age", "updated_at")
 
 # ----------------------------
 # 4. Create table user_data
 # ----------------------------
 def create_table(connection):
+    # user_data, its indexes and seed_chunks, in the backend's dialect.
+    # user_id is CHAR(36), or BINARY(16) with ALX_DB_UUID_STORAGE=binary
+    # (chosen when the table is created).
     cursor = connection.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_data (
-            user_id CHAR(36) PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            email VARCHAR(255) NOT NULL UNIQUE,
-            age DECIMAL(3,0) NOT NULL,
-            INDEX idx_user_id (user_id)
-        )
-    """)
+    for statement in backends.get_backend().schema:
+        cursor.execute(statement)
     connection.commit()
     cursor.close()
+    ensure_change_tracking(connection)
+    ensure_indexes(connection)
+
+
+def ensure_change_tracking(connection):
+    """
+    Add the updated_at high-water mark column to a user_data table created
+    before it existed. The database maintains it on insert and on every
+    upsert that actually changes a row.
+    """
+    backend = backends.get_backend()
+    cursor = connection.cursor()
+    if not backend.has_column(cursor, "user_data", "updated_at"):
+        for statement in backend.change_tracking:
+            cursor.execute(statement)
+        connection.commit()
+    cursor.close()
+
+
+def ensure_indexes(connection):
+    """
+    Bring the indexes of an existing user_data table up to date: drop the
+    old idx_user_id and idx_age_name_email (duplicates of the primary key
+    and of idx_age) and add the indexes the generators' queries rely on.
+    """
+    backend = backends.get_backend()
+    cursor = connection.cursor()
+    statements = backend.index_migrations(backend.index_names(cursor, "user_data"))
+    for statement in statements:
+        cursor.execute(statement)
+    if statements:
+        connection.commit()
+    cursor.close()
+
+
+class SampleId(str):
+    """A user_id (or hex prefix) sample parameter, stored via encode_id()."""
+
+
+_FIRST_ID = SampleId("00000000-0000-0000-0000-000000000000")
+# Full scans by design: every row, or most of them for min_age=25
+EXPECTED_SCANS = ("stream_users", "stream_users_in_column_batches")
+
+
+# Query of each generator, with sample parameters, for explain_queries()
+GENERATOR_QUERIES = {
+    "stream_users": ("SELECT * FROM user_data", ()),
+    "stream_users_in_range": (
+        "SELECT * FROM user_data WHERE user_id >= %s AND user_id < %s "
+        "ORDER BY user_id", (SampleId("40000000"), SampleId("80000000"))),
+    "stream_users_in_batches": (
+        "SELECT * FROM user_data WHERE age > %s", (25,)),
+    "stream_users_in_column_batches": (
+        "SELECT user_id, name, email, CAST(age AS UNSIGNED) "
+        "FROM user_data WHERE age > %s", (25,)),
+    "lazy_pagination": (
+        "SELECT * FROM user_data WHERE (user_id) > (%s) "
+        "ORDER BY user_id LIMIT %s", (_FIRST_ID, 100)),
+    "lazy_pagination(order_by=age)": (
+        "SELECT * FROM user_data WHERE (age, user_id) > (%s, %s) "
+        "ORDER BY age, user_id LIMIT %s",
+        (25, _FIRST_ID, 100)),
+    "stream_user_ages": ("SELECT age FROM user_data", ()),
+    "stream_changed_users": (
+        "SELECT * FROM user_data WHERE (updated_at, user_id) > (%s, %s) "
+        "ORDER BY updated_at, user_id",
+        ("1970-01-01 00:00:00", _FIRST_ID)),
+}
+
+
+def explain_queries(connection):
+    """
+    Print the index each generator's query uses according to EXPLAIN.
+    EXPECTED_SCANS are full scans by design; the others should use an index.
+    Returns {generator: list of indexes, or None for a full scan}.
+    """
+    backend = backends.get_backend()
+    cursor = connection.cursor()
+    plans = {}
+    for name, (query, params) in GENERATOR_QUERIES.items():
+        params = tuple(backend.encode_id(value) if isinstance(value, SampleId)
+                       else value for value in params)
+        plans[name] = used = backend.explain(cursor, query, params)
+        if used:
+            print(f"  OK   {name}: {', '.join(used)}")
+        else:
+            expected = " (expected)" if name in EXPECTED_SCANS else ""
+            print(f"  SCAN {name}: full table scan{expected}")
+    cursor.close()
+    return plans
 
 # ----------------------------
 # 5. Insert data into table
@@ -54,12 +141,9 @@ def create_table(connection):
 def insert_data(connection, data):
     cursor = connection.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO user_data (user_id, name, email, age)
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-            name=VALUES(name), age=VALUES(age)
-        """, data)
+        backend = backends.get_backend()
+        cursor.execute(backend.upsert_users(1),
+                       (backend.encode_id(data[0]), *data[1:]))
         connection.commit()
     except Exception as e:
         print("Insert failed:", e)
@@ -67,19 +151,278 @@ def insert_data(connection, data):
         cursor.close()
 
 # ----------------------------
-# 6. Generator to stream rows
+# 6. Bulk insert data in chunks
 # ----------------------------
-def stream_rows(connection):
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_data")
-    for row in cursor:
-        yield row  # yield one row at a time
+# Namespace for deterministic user ids: the same email always maps to the
+# same user_id, so re-seeding updates rows instead of adding new ones.
+USER_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "user_data.alx_prodev")
+
+
+def user_id_for(email):
+    return str(uuid.uuid5(USER_ID_NAMESPACE, email.strip().lower()))
+
+
+def _readlines(csvfile):
+    # Pull lines with readline() rather than iteration so csvfile.tell()
+    # stays usable between records.
+    while True:
+        line = csvfile.readline()
+        if not line:
+            return
+        yield line
+
+
+def read_csv_chunks_from(path, chunk_size=1000, offset=0):
+    """
+    Generator that parses the CSV from byte offset `offset` (0 for the
+    start) and yields (chunk, end_offset, digest) for every chunk_size rows:
+    the (user_id, name, email, age) tuples, the offset just past the chunk,
+    and a SHA-256 of the chunk's contents.
+    """
+    with open(path, newline="") as csvfile:
+        lines = _readlines(csvfile)
+        reader = csv.reader(lines)
+        header = next(reader)
+        name, email, age = (header.index(column)
+                            for column in ("name", "email", "age"))
+        if offset:
+            csvfile.seek(offset)
+
+        chunk = []
+        digest = hashlib.sha256()
+        for row in reader:
+            chunk.append((user_id_for(row[email]), row[name], row[email], row[age]))
+            digest.update("\x1f".join(row).encode() + b"\n")
+            if len(chunk) == chunk_size:
+                yield chunk, csvfile.tell(), digest.hexdigest()
+                chunk = []
+                digest = hashlib.sha256()
+        if chunk:
+            yield chunk, csvfile.tell(), digest.hexdigest()  # last partial chunk
+
+
+def read_csv_chunks(path, chunk_size=1000):
+    """
+    Generator that streams the CSV and yields lists of
+    (user_id, name, email, age) tuples of at most chunk_size rows.
+    """
+    for chunk, _, _ in read_csv_chunks_from(path, chunk_size):
+        yield chunk
+
+
+def insert_many(connection, rows):
+    """
+    Insert a list of rows with a single multi-row INSERT statement.
+    Does not commit. Returns the number of rows that failed.
+    """
+    backend = backends.get_backend()
+    if backend.binary_ids:
+        rows = [(backend.encode_id(row[0]), *row[1:]) for row in rows]
+    cursor = connection.cursor()
+    try:
+        params = [value for row in rows for value in row]
+        cursor.execute(backend.upsert_users(len(rows)), params)
+        return 0
+    except backend.Error:
+        # One bad row fails the whole statement: retry row by row
+        # so only the offending rows are lost.
+        errors = 0
+        for row in rows:
+            try:
+                cursor.execute(backend.upsert_users(1), row)
+            except backend.Error as e:
+                print("Insert failed:", e)
+                errors += 1
+        return errors
+    finally:
+        cursor.close()
+
+
+def load_seed_checkpoint(path):
+    """Return the byte offset and row count stored at path, or (0, 0)."""
+    try:
+        with open(path) as checkpoint:
+            state = json.load(checkpoint)
+    except FileNotFoundError:
+        return 0, 0
+    return state["offset"], state["rows"]
+
+
+def save_seed_checkpoint(path, offset, rows):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as checkpoint:
+        json.dump({"offset": offset, "rows": rows}, checkpoint)
+    os.replace(tmp, path)
+
+
+def loaded_chunks(connection, digests):
+    """Return the subset of chunk digests already recorded in seed_chunks."""
+    if not digests:
+        return set()
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT chunk_hash FROM seed_chunks WHERE chunk_hash IN "
+        f"({', '.join(['%s'] * len(digests))})", list(digests))
+    found = {digest for (digest,) in cursor.fetchall()}
     cursor.close()
+    return found
+
+
+def bulk_load(connection, path="user_data.csv", chunk_size=1000, commit_every=10,
+              checkpoint="user_data.csv.checkpoint", workers=1):
+    """
+    Load the CSV in chunks of chunk_size rows, one INSERT per chunk,
+    committing once every commit_every chunks.
+
+    The load is resumable and idempotent: user ids are derived from the
+    email, every committed chunk's content hash is recorded in seed_chunks
+    (and skipped when seen again), and the byte offset reached at each
+    commit is written to the checkpoint file so a crashed run restarts from
+    there. The checkpoint is removed once the whole file is loaded.
+    Pass checkpoint=None to always start from the top.
+
+    With workers > 1 the file is memory-mapped and parsed in parallel
+    processes (see csv_mmap), for multi-GB exports.
+
+    Returns a dict with rows, skipped rows, errors, per-chunk errors,
+    seconds and rows/sec.
+    """
+    start = time.perf_counter()
+    offset, rows = load_seed_checkpoint(checkpoint) if checkpoint else (0, 0)
+    if offset:
+        print(f"Resuming at byte {offset} after {rows} rows")
+    loaded = skipped = 0
+    chunk_errors = []
+    pending = []
+    if workers > 1:
+        csv_mmap = __import__('csv_mmap')
+        chunks = csv_mmap.read_csv_chunks_parallel(path, chunk_size, offset,
+                                                   workers)
+    else:
+        chunks = read_csv_chunks_from(path, chunk_size, offset)
+    for chunk, end, digest in chunks:
+        pending.append((chunk, end, digest))
+        if len(pending) < commit_every:
+            continue
+        loaded, skipped = _load_chunks(connection, pending, chunk_errors,
+                                       loaded, skipped)
+        rows += sum(len(chunk) for chunk, _, _ in pending)
+        if checkpoint:
+            save_seed_checkpoint(checkpoint, pending[-1][1], rows)
+        pending = []
+    if pending:
+        loaded, skipped = _load_chunks(connection, pending, chunk_errors,
+                                       loaded, skipped)
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": loaded,
+        "skipped": skipped,
+        "errors": sum(chunk_errors),
+        "chunk_errors": chunk_errors,
+        "seconds": seconds,
+        "rows_per_sec": loaded / seconds if seconds else 0.0,
+    }
+    print(f"Loaded {loaded} rows in {len(chunk_errors)} chunks "
+          f"({stats['errors']} errors, {skipped} rows already loaded) "
+          f"- {stats['rows_per_sec']:.0f} rows/sec")
+    return stats
+
+
+def _load_chunks(connection, pending, chunk_errors, loaded, skipped):
+    # Insert the chunks not loaded yet and record their hashes in the same
+    # transaction, so a chunk is either fully recorded or retried.
+    done = loaded_chunks(connection, [digest for _, _, digest in pending])
+    cursor = connection.cursor()
+    for chunk, _, digest in pending:
+        if digest in done:
+            skipped += len(chunk)
+            continue
+        errors = insert_many(connection, chunk)
+        cursor.execute(
+            backends.get_backend().insert_ignore(
+                "seed_chunks", ("chunk_hash", "rows_loaded")),
+            (digest, len(chunk) - errors))
+        loaded += len(chunk) - errors
+        chunk_errors.append(errors)
+        if errors:
+            print(f"Chunk {len(chunk_errors)}: {errors} of {len(chunk)} rows failed")
+        done.add(digest)
+    cursor.close()
+    connection.commit()
+    return loaded, skipped
+
+# ----------------------------
+# 7. Generator to stream rows
+# ----------------------------
+def row_converter(columns, row_factory=None):
+    """
+    Function turning a raw driver row into the row_factory's form (user_id
+    decoded from the backend's storage first), or None to keep raw tuples.
+    """
+    decode = backends.get_backend().decode_row(columns)
+    convert = row_factories.get_row_factory(row_factory)(columns)
+    if decode is None:
+        return convert
+    if convert is None:
+        return decode
+    return lambda row: convert(decode(row))
+
+
+def stream_query_batches(connection, query, params=None, batch_size=1000,
+                         buffered=False, row_factory=None):
+    """
+    Generator that yields the rows of `query` as lists of batch_size rows,
+    pulled straight from the driver with fetchmany(). The last batch may be
+    shorter.
+
+    With buffered=False (the default) the cursor is unbuffered: rows are read
+    from the server one batch at a time, so client memory stays flat however
+    large the result is. buffered=True loads the whole result set first.
+    Rows are built by row_factory (see row_factories), dicts by default.
+    """
+    cursor = connection.cursor(buffered=buffered)
+    try:
+        cursor.execute(query, params)
+        convert = row_converter(cursor.column_names, row_factory)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if convert is not None:
+                rows = list(map(convert, rows))
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except backends.get_backend().Error:
+            # Unbuffered cursor closed before the last row was read
+            pass
+
+
+def stream_query(connection, query, params=None, buffered=False,
+                 fetch_size=1000, row_factory=None):
+    """
+    Generator that yields the rows of `query` one at a time, reading
+    fetch_size rows per round trip (see stream_query_batches).
+    """
+    for rows in stream_query_batches(connection, query, params, fetch_size,
+                                     buffered, row_factory):
+        yield from rows
+
+
+def stream_rows(connection, buffered=False, fetch_size=1000, row_factory=None):
+    for row in stream_query(connection, "SELECT * FROM user_data",
+                            buffered=buffered, fetch_size=fetch_size,
+                            row_factory=row_factory):
+        yield row  # yield one row at a time
 
 # ----------------------------
-# 7. Main seeding logic
+# 8. Main seeding logic
 # ----------------------------
-def main():
+def main(chunk_size=1000, commit_every=10, workers=1):
     # Step 1: connect to MySQL server
     conn = connect_db()
     create_database(conn)
@@ -89,14 +432,14 @@ def main():
     conn = connect_to_prodev()
     create_table(conn)
 
-    # Step 3: read CSV and insert data
-    with open("user_data.csv", newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            user_id = str(uuid.uuid4())  # generate UUID
-            insert_data(conn, (user_id, row["name"], row["email"], row["age"]))
+    # Step 3: read CSV and bulk insert data
+    bulk_load(conn, "user_data.csv", chunk_size, commit_every, workers=workers)
+
+    # Step 4: check each generator's query against the indexes
+    print("Index use per generator query (EXPLAIN):")
+    explain_queries(conn)
 
-    # Step 4: stream rows with generator
+    # Step 5: stream rows with generator
     print("Streaming rows one by one:")
     for row in stream_rows(conn):
         print(row)
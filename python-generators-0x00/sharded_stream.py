@@ -0,0 +1,78 @@
+"""
+Globally ordered stream over user_data shards.
+
+Each shard (a table or database with the user_data schema) is read through
+its own ordered, unbuffered cursor, and the streams are combined with a
+heap-based k-way merge (heapq.merge). Only the current fetch batch of each
+shard is held in memory.
+"""
+import heapq
+
+backends = __import__('backends')
+seed = __import__('seed')
+row_factories = __import__('row_factories')
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+class Shard:
+    """
+    One shard: a table name, optionally database-qualified
+    ("shard_2.user_data"), and the function that opens a connection to the
+    server holding it (the shared pool by default).
+    """
+
+    def __init__(self, table="user_data", connect=None):
+        self.table = table
+        self.connect = connect or seed.connect_to_prodev
+
+    def __repr__(self):
+        return f"Shard({self.table!r})"
+
+
+def _stream_shard(shard, order, batch_size, row_factory):
+    # Unbuffered cursors cannot share a connection, so one per shard
+    connection = shard.connect()
+    try:
+        yield from seed.stream_query(
+            connection, f"SELECT * FROM {shard.table} ORDER BY {order}",
+            fetch_size=batch_size, row_factory=row_factory)
+    finally:
+        connection.close()
+
+
+def stream_users_sharded(shards, order_by="user_id", batch_size=1000,
+                         row_factory=None):
+    """
+    Generator that yields the users of every shard as one stream ordered by
+    (order_by, user_id).
+
+    Args:
+        shards (list): Shard objects, or table names on the default server.
+            Every shard holds a connection for the whole stream, so the
+            pool (ALX_DB_POOL_SIZE) needs at least one per shard.
+        order_by (str): Indexed column to merge on (see lazy_pagination).
+            On MySQL, text keys are sorted with a binary collation so they
+            match Python ordering, which means a filesort per shard
+            instead of an index scan.
+        batch_size (int): Rows fetched per shard per round trip.
+        row_factory: How rows are built (see row_factories), dicts by default.
+    """
+    key = lazy_paginate._sort_key(order_by)
+    shards = [shard if isinstance(shard, Shard) else Shard(shard)
+              for shard in shards]
+
+    def sort_key(row):
+        return tuple(row_factories.row_value(row, column, seed.USER_COLUMNS)
+                     for column in key)
+
+    # heapq.merge compares with Python ordering, so every shard must come
+    # back in code point order rather than the server's collation order
+    backend = backends.get_backend()
+    order = ", ".join(backend.codepoint_order(column) for column in key)
+    streams = [_stream_shard(shard, order, batch_size, row_factory)
+               for shard in shards]
+    try:
+        yield from heapq.merge(*streams, key=sort_key)
+    finally:
+        for stream in streams:
+            stream.close()
@@ -0,0 +1,171 @@
+"""
+Spool a row stream to disk so a slow consumer does not hold the cursor open.
+
+A background thread drains the source generator at database speed into
+gzip-compressed segment files in a temporary directory; once the source is
+exhausted its cursor and pooled connection are released, however far
+behind the consumer is. The consumer then replays the segments at its own
+pace, optionally throttled to a fixed rate.
+
+    for user in spooled_stream(stream_users(), rate=500):
+        push_over_http(user)
+
+Disk use can be bounded with watermarks: when the backlog (rows spooled but
+not yet replayed) reaches high_watermark the spooler closes the source,
+releasing its cursor and connection rather than holding them open while it
+waits, and once the consumer brings the backlog down to low_watermark it
+reopens the source with resume(last_row), e.g. a keyset query:
+
+    spooled_stream(stream_users_in_range(), high_watermark=50000,
+                   resume=lambda last: stream_users_in_range(
+                       after=last["user_id"]))
+"""
+import gzip
+import os
+import pickle
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+_DONE = object()
+
+
+class _Spooler:
+    def __init__(self, source, resume, segment_rows, high_watermark,
+                 low_watermark, directory):
+        self.source = source
+        self.resume = resume
+        self.segment_rows = segment_rows
+        self.high_watermark = high_watermark
+        self.low_watermark = (low_watermark if low_watermark is not None
+                              else (high_watermark // 2 if high_watermark else None))
+        self.directory = tempfile.mkdtemp(prefix="user_spool_", dir=directory)
+        self.segments = queue.Queue()
+        self.backlog = 0
+        self.paused = threading.Condition()
+        self.stop = threading.Event()
+        self.error = None
+
+    def _full(self):
+        if not self.high_watermark:
+            return False
+        with self.paused:
+            return self.backlog >= self.high_watermark
+
+    def _wait_for_room(self):
+        with self.paused:
+            while self.backlog > self.low_watermark and not self.stop.is_set():
+                self.paused.wait(0.1)
+
+    def _write_segment(self, number, rows):
+        path = os.path.join(self.directory, f"{number:08d}.pickle.gz")
+        with gzip.open(path, "wb", compresslevel=1) as segment:
+            pickle.dump(rows, segment, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.paused:
+            self.backlog += len(rows)
+        self.segments.put(path)
+
+    def _close_source(self):
+        close = getattr(self.source, "close", None)
+        if close is not None:
+            close()  # releases the cursor and its pooled connection
+
+    def run(self):
+        rows = []
+        number = 0
+        try:
+            while True:
+                for row in self.source:
+                    rows.append(row)
+                    if len(rows) == self.segment_rows:
+                        self._write_segment(number, rows)
+                        number += 1
+                        last = rows[-1]
+                        rows = []
+                        if self.stop.is_set():
+                            return
+                        if self._full():
+                            break
+                else:
+                    if rows:
+                        self._write_segment(number, rows)
+                    return
+                # Backlog is full: let go of the cursor while the consumer
+                # catches up, then pick up again after the last spooled row
+                self._close_source()
+                self._wait_for_room()
+                if self.stop.is_set():
+                    return
+                self.source = iter(self.resume(last))
+        except BaseException as error:
+            self.error = error
+            if rows and not self.stop.is_set():
+                # Deliver the rows read before the failure, then the error
+                try:
+                    self._write_segment(number, rows)
+                except BaseException:
+                    pass  # the original error is the one reported
+        finally:
+            self._close_source()
+            self.segments.put(_DONE)
+
+    def consumed(self, count):
+        with self.paused:
+            self.backlog -= count
+            self.paused.notify_all()
+
+
+def spooled_stream(source, rate=None, high_watermark=None, low_watermark=None,
+                   segment_rows=10000, directory=None, resume=None):
+    """
+    Generator that yields the rows of `source` after spooling them to
+    compressed temporary files.
+
+    Args:
+        source: A row generator, e.g. stream_users().
+        rate (float): Maximum rows per second handed to the consumer.
+        high_watermark (int): Backlog in rows at which the source is closed.
+            None spools the whole source without pausing.
+        low_watermark (int): Backlog at which spooling resumes
+            (half the high watermark by default).
+        segment_rows (int): Rows per compressed segment file.
+        directory (str): Where the temporary spool directory is created.
+        resume: Called with the last spooled row to reopen the source after
+            a pause; must yield the rows that come after it. Required with
+            high_watermark.
+    """
+    if high_watermark and resume is None:
+        raise ValueError("high_watermark needs resume= to reopen the source")
+    spooler = _Spooler(iter(source), resume, segment_rows, high_watermark,
+                       low_watermark, directory)
+    writer = threading.Thread(target=spooler.run, daemon=True)
+    writer.start()
+    start = time.monotonic()
+    replayed = 0
+    try:
+        while True:
+            path = spooler.segments.get()
+            if path is _DONE:
+                if spooler.error is not None:
+                    raise spooler.error
+                break
+            with gzip.open(path, "rb") as segment:
+                rows = pickle.load(segment)
+            os.remove(path)
+            spooler.consumed(len(rows))
+            for row in rows:
+                if rate:
+                    # Throttle: never run ahead of rate rows per second
+                    delay = replayed / rate - (time.monotonic() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                replayed += 1
+                yield row
+    finally:
+        spooler.stop.set()
+        with spooler.paused:
+            spooler.paused.notify_all()
+        writer.join()
+        shutil.rmtree(spooler.directory, ignore_errors=True)
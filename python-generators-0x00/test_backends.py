@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the backends module's SQLite connection wrapper.
+
+Classes:
+    TestSQLitePlaceholders: %s and %% translation around string literals
+"""
+import os
+import tempfile
+import unittest
+
+import backends
+
+
+class TestSQLitePlaceholders(unittest.TestCase):
+    """Tests for backends.sqlite_placeholders() and SQLiteCursor.execute()."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection = backends.SQLiteConnection(
+            os.path.join(self.directory.name, "backends.sqlite3"))
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("CREATE TABLE people (name TEXT, age INT)")
+        for name, age in (("smith", 40), ("Blacksmith", 50), ("smithers", 60),
+                          ("Jones", 70), ("young smith", 20)):
+            self.cursor.execute("INSERT INTO people VALUES (%s, %s)", (name, age))
+        self.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def test_placeholders_outside_literals(self):
+        """Only %s outside quotes becomes ?, and %% becomes % everywhere."""
+        self.assertEqual(
+            backends.sqlite_placeholders(
+                "SELECT * FROM t WHERE a LIKE '%smith%' AND b > %s AND c = \"%s\""),
+            "SELECT * FROM t WHERE a LIKE '%smith%' AND b > ? AND c = \"%s\"")
+        self.assertEqual(
+            backends.sqlite_placeholders("SELECT 'it''s %%s', x %% %s"),
+            "SELECT 'it''s %s', x % ?")
+
+    def test_like_literal_with_parameter(self):
+        """A LIKE pattern starting with s is not mistaken for a placeholder."""
+        self.cursor.execute(
+            "SELECT name FROM people WHERE name LIKE '%smith%' AND age > %s "
+            "ORDER BY age", (30,))
+        self.assertEqual(self.cursor.fetchall(),
+                         [("smith",), ("Blacksmith",), ("smithers",)])
+
+    def test_escaped_percent_in_parameterised_query(self):
+        """%% in a query with parameters reaches SQLite as a single %."""
+        self.cursor.execute(
+            "SELECT COUNT(*) FROM people WHERE name LIKE %s || '%%'", ("smith",))
+        self.assertEqual(self.cursor.fetchone(), (2,))
+
+    def test_query_without_params_is_untouched(self):
+        """Without parameters the query runs exactly as written."""
+        self.cursor.execute("SELECT COUNT(*) FROM people WHERE name LIKE '%%'")
+        self.assertEqual(self.cursor.fetchone(), (5,))
+
+
+if __name__ == "__main__":
+    unittest.main()
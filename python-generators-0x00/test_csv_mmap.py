@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the csv_mmap module.
+
+Classes:
+    TestRecordBoundaries: _next_record_end and record_ranges on quoted data
+    TestParallelRead: read_csv_chunks_parallel against the serial reader
+"""
+import csv
+import io
+import mmap
+import os
+import tempfile
+import unittest
+
+import csv_mmap
+import seed
+
+
+def _records(data, ranges):
+    """Parse every range separately, as the workers do."""
+    rows = []
+    for lo, hi in ranges:
+        rows.extend(csv.reader(io.StringIO(data[lo:hi].decode(), newline="")))
+    return rows
+
+
+class TestRecordBoundaries(unittest.TestCase):
+    """Cuts land on record boundaries whatever the quoting."""
+
+    def setUp(self):
+        self.file = tempfile.TemporaryFile()
+
+    def tearDown(self):
+        self.file.close()
+
+    def map(self, data):
+        self.file.write(data)
+        self.file.flush()
+        return mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def test_newline_inside_quotes_is_skipped(self):
+        """A newline in a quoted field does not end the record."""
+        data = b'a,"line one\nline two",1\nb,c,2\n'
+        with self.map(data) as mm:
+            self.assertEqual(csv_mmap._next_record_end(mm, 0, 0),
+                             data.index(b",1\n") + 3)
+
+    def test_cut_inside_quoted_field(self):
+        """Starting mid-field, the quote parity carries to the real end."""
+        data = b'a,"x\ny",1\nb,c,2\n'
+        with self.map(data) as mm:
+            inside = data.index(b"x") + 1
+            self.assertEqual(
+                csv_mmap._next_record_end(mm, inside, 1), data.index(b"b"))
+
+    def test_doubled_quotes_at_cut(self):
+        """An escaped "" next to the cut leaves the parity unchanged."""
+        data = b'a,"say ""hi""\nthere",1\nb,c,2\n'
+        with self.map(data) as mm:
+            cut = data.index(b'""hi') + 1  # between the two quotes
+            parity = csv_mmap._quote_parity(mm, 0, cut)
+            self.assertEqual(parity, 0)  # opening quote plus one of the pair
+            self.assertEqual(csv_mmap._next_record_end(mm, cut, parity),
+                             data.index(b"b,c"))
+
+    def test_crlf_line_endings(self):
+        """With CRLF the boundary is just past the \\n, \\r stays in the record."""
+        data = b'a,"x\r\ny",1\r\nb,c,2\r\n'
+        with self.map(data) as mm:
+            self.assertEqual(csv_mmap._next_record_end(mm, 0, 0), data.index(b"b"))
+            ranges = csv_mmap.record_ranges(mm, 0, 4)
+        self.assertEqual(_records(data, ranges),
+                         [["a", "x\r\ny", "1"], ["b", "c", "2"]])
+
+    def test_end_without_newline(self):
+        """The last record may end at EOF without a newline."""
+        data = b'a,b,1\nc,d,2'
+        with self.map(data) as mm:
+            self.assertEqual(csv_mmap._next_record_end(mm, 7, 0), len(data))
+
+    def test_ranges_hold_whole_records(self):
+        """Every range parses to whole rows, together the whole file."""
+        rows = [[f"name {i}", f'multi\nline "{i}"', str(i)] for i in range(200)]
+        text = io.StringIO(newline="")
+        csv.writer(text).writerows(rows)
+        data = text.getvalue().encode()
+        with self.map(data) as mm:
+            for range_size in (7, 64, 1000):
+                ranges = csv_mmap.record_ranges(mm, 0, range_size)
+                self.assertEqual(ranges[0][0], 0)
+                self.assertEqual(ranges[-1][1], len(data))
+                self.assertTrue(all(hi == lo for (_, hi), (lo, _)
+                                    in zip(ranges, ranges[1:])))
+                self.assertEqual(_records(data, ranges), rows)
+
+    def test_cuts_are_stable_when_resuming(self):
+        """Resuming from any boundary reproduces the remaining cuts."""
+        rows = [[f"user{i}", f'"quoted"\n{i}', str(i)] for i in range(100)]
+        text = io.StringIO(newline="")
+        csv.writer(text).writerows(rows)
+        with self.map(text.getvalue().encode()) as mm:
+            ranges = csv_mmap.record_ranges(mm, 0, 256)
+            for index, (lo, _) in enumerate(ranges):
+                self.assertEqual(csv_mmap.record_ranges(mm, lo, 256),
+                                 ranges[index:])
+
+
+class TestParallelRead(unittest.TestCase):
+    """read_csv_chunks_parallel matches seed.read_csv_chunks_from."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "user_data.csv")
+        with open(self.path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "age"])
+            for i in range(500):
+                writer.writerow([f'User "{i}"\nJr', f"user{i}@example.com", i % 90])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_rows_in_order(self):
+        """More ranges than the in-flight window still arrive in file order."""
+        parallel = list(csv_mmap.read_csv_chunks_parallel(
+            self.path, chunk_size=40, workers=2, range_size=512))
+        serial = list(seed.read_csv_chunks_from(self.path, chunk_size=40))
+        self.assertEqual([row for chunk, _, _ in parallel for row in chunk],
+                         [row for chunk, _, _ in serial for row in chunk])
+
+    def test_resume_from_offset(self):
+        """Resuming at a yielded offset yields exactly the remaining rows."""
+        chunks = list(csv_mmap.read_csv_chunks_parallel(
+            self.path, chunk_size=40, workers=2, range_size=512))
+        _, offset, _ = chunks[len(chunks) // 2]
+        resumed = list(csv_mmap.read_csv_chunks_parallel(
+            self.path, chunk_size=40, offset=offset, workers=2, range_size=512))
+        rows = [row for chunk, _, _ in chunks for row in chunk]
+        tail = [row for chunk, _, _ in resumed for row in chunk]
+        self.assertEqual(rows[-len(tail):], tail)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pool module, run against the SQLite backend.
+
+Classes:
+    TestConnectionPool: checkout, timeout, discard and wake-up behaviour
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import backends
+import pool
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for pool.ConnectionPool."""
+
+    def setUp(self):
+        """Point the backend at a throwaway SQLite file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.previous = backends.get_backend()
+        backends.set_backend(backends.SQLiteBackend(
+            os.path.join(self.directory.name, "pool.sqlite3")))
+
+    def tearDown(self):
+        backends.set_backend(self.previous)
+        self.directory.cleanup()
+
+    def test_reuses_released_connection(self):
+        """A released connection is handed out again, not reopened."""
+        db_pool = pool.ConnectionPool(size=2)
+        first = db_pool.get_connection()
+        raw = first._connection
+        first.close()
+        second = db_pool.get_connection()
+        self.assertIs(second._connection, raw)
+        second.close()
+        self.assertEqual(db_pool.stats()["created"], 1)
+        self.assertEqual(db_pool.stats()["checkouts"], 2)
+
+    def test_timeout_when_exhausted(self):
+        """get_connection() raises TimeoutError once the pool is exhausted."""
+        db_pool = pool.ConnectionPool(size=1)
+        held = db_pool.get_connection()
+        with self.assertRaises(TimeoutError):
+            db_pool.get_connection(timeout=0.1)
+        held.close()
+
+    def test_waiter_gets_released_connection(self):
+        """A blocked caller is woken by release()."""
+        db_pool = pool.ConnectionPool(size=1)
+        held = db_pool.get_connection()
+        threading.Timer(0.1, held.close).start()
+        start = time.monotonic()
+        db_pool.get_connection(timeout=3).close()
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_discard_wakes_waiter(self):
+        """Discarding a broken connection frees its slot for a waiter."""
+        db_pool = pool.ConnectionPool(size=1)
+        held = db_pool.get_connection()
+
+        def discard():
+            held._connection.unread_result = True
+            held.close()
+
+        threading.Timer(0.1, discard).start()
+        start = time.monotonic()
+        replacement = db_pool.get_connection(timeout=3)
+        self.assertLess(time.monotonic() - start, 1)
+        replacement.close()
+        self.assertEqual(db_pool.stats()["created"], 1)
+
+    def test_release_rolls_back_open_transaction(self):
+        """Connections go back to the pool without an open transaction."""
+        db_pool = pool.ConnectionPool(size=1)
+        connection = db_pool.get_connection()
+        cursor = connection.cursor()
+        cursor.execute("CREATE TABLE t (x INT)")
+        connection.commit()
+        cursor.execute("INSERT INTO t VALUES (1)")
+        connection.close()
+        connection = db_pool.get_connection()
+        self.assertFalse(connection.in_transaction)
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM t")
+        self.assertEqual(cursor.fetchone(), (0,))
+        connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
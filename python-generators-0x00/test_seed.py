@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for seed.bulk_load(), run against the SQLite backend.
+
+Classes:
+    TestBulkLoad: resuming from the checkpoint, skipping loaded chunks and
+        counting per-chunk errors
+"""
+import csv
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import backends
+import seed
+
+
+class TestBulkLoad(unittest.TestCase):
+    """Tests for seed.bulk_load() and its checkpoint helpers."""
+
+    ROWS = 95
+
+    def setUp(self):
+        """Write a CSV and create user_data in a throwaway SQLite file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.previous = backends.get_backend()
+        backends.set_backend(backends.SQLiteBackend(
+            os.path.join(self.directory.name, "seed.sqlite3")))
+        self.csv = os.path.join(self.directory.name, "user_data.csv")
+        self.checkpoint = self.csv + ".checkpoint"
+        with open(self.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "age"])
+            for i in range(self.ROWS):
+                writer.writerow([f"User {i}", f"user{i}@example.com", 20 + i % 60])
+        self.connection = backends.get_backend().connect()
+        seed.create_table(self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+        backends.set_backend(self.previous)
+        self.directory.cleanup()
+
+    def count(self, table="user_data"):
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        (count,), = cursor.fetchall()
+        cursor.close()
+        return count
+
+    def load(self, **options):
+        options.setdefault("checkpoint", self.checkpoint)
+        with mock.patch("builtins.print"):
+            return seed.bulk_load(self.connection, self.csv, chunk_size=10,
+                                  commit_every=2, **options)
+
+    def test_interrupted_load_resumes_from_offset(self):
+        """A crashed load restarts at the checkpoint and loads the rest."""
+        insert_many = seed.insert_many
+        calls = []
+
+        def crash_on_fifth_chunk(connection, rows):
+            calls.append(rows)
+            if len(calls) == 5:
+                raise KeyboardInterrupt
+            return insert_many(connection, rows)
+
+        with mock.patch.object(seed, "insert_many", crash_on_fifth_chunk):
+            with self.assertRaises(KeyboardInterrupt):
+                self.load()
+        self.connection.rollback()
+        offset, rows = seed.load_seed_checkpoint(self.checkpoint)
+        self.assertEqual(rows, 40)  # two commits of two 10-row chunks
+        self.assertEqual(self.count(), 40)
+
+        # The resumed run reads from the saved offset: nothing is replayed
+        resumed = []
+        read = seed.read_csv_chunks_from
+
+        def record_offset(path, chunk_size, start):
+            resumed.append(start)
+            return read(path, chunk_size, start)
+
+        with mock.patch.object(seed, "read_csv_chunks_from", record_offset):
+            stats = self.load()
+        self.assertEqual(resumed, [offset])
+        self.assertEqual(stats["rows"], self.ROWS - 40)
+        self.assertEqual(stats["skipped"], 0)
+        self.assertEqual(self.count(), self.ROWS)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_rerun_skips_loaded_chunks(self):
+        """Every chunk whose hash is in seed_chunks is skipped."""
+        first = self.load(checkpoint=None)
+        self.assertEqual(first["rows"], self.ROWS)
+        self.assertEqual(self.count("seed_chunks"), 10)
+        with mock.patch.object(seed, "insert_many") as insert_many:
+            second = self.load(checkpoint=None)
+        insert_many.assert_not_called()
+        self.assertEqual(second["rows"], 0)
+        self.assertEqual(second["skipped"], self.ROWS)
+        self.assertEqual(second["chunk_errors"], [])
+        self.assertEqual(self.count(), self.ROWS)
+
+    def test_bad_row_counted_in_its_chunk(self):
+        """A failing row is counted in chunk_errors; its chunk still loads."""
+        cursor = self.connection.cursor()
+        # Stands in for MySQL rejecting a non-numeric DECIMAL in strict mode
+        cursor.execute("""
+            CREATE TRIGGER reject_bad_age BEFORE INSERT ON user_data
+            WHEN typeof(new.age) <> 'integer'
+            BEGIN SELECT RAISE(ABORT, 'bad age'); END
+        """)
+        self.connection.commit()
+        cursor.close()
+        with open(self.csv, "a", newline="") as f:
+            csv.writer(f).writerow(["Bad Age", "bad@example.com", "unknown"])
+
+        stats = self.load()
+        self.assertEqual(stats["chunk_errors"], [0] * 9 + [1])
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["rows"], self.ROWS)
+        self.assertEqual(self.count(), self.ROWS)
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT rows_loaded FROM seed_chunks")
+        self.assertEqual(sorted(n for (n,) in cursor.fetchall()), [5] + [10] * 9)
+        cursor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
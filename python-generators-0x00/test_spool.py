@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the spool module, run against the SQLite backend.
+
+Classes:
+    TestSpooledStream: replay across pauses, connection release, early
+        close, error propagation and temp directory cleanup
+"""
+import os
+import tempfile
+import time
+import unittest
+
+import backends
+import pool
+import seed
+import spool
+
+stream_users = __import__('0-stream_users')
+
+
+class TestSpooledStream(unittest.TestCase):
+    """Tests for spool.spooled_stream()."""
+
+    ROWS = 2000
+
+    def setUp(self):
+        """Fill user_data in a throwaway SQLite file behind a fresh pool."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.spool_directory = os.path.join(self.directory.name, "spool")
+        os.mkdir(self.spool_directory)
+        self.previous = backends.get_backend()
+        backends.set_backend(backends.SQLiteBackend(
+            os.path.join(self.directory.name, "spool.sqlite3")))
+        self.pool = pool.ConnectionPool(size=2)
+        pool.set_pool(self.pool)
+        connection = seed.connect_to_prodev()
+        seed.create_table(connection)
+        seed.insert_many(connection, [
+            (seed.user_id_for(f"user{i}@example.com"), f"User {i}",
+             f"user{i}@example.com", 20 + i % 60) for i in range(self.ROWS)])
+        connection.commit()
+        connection.close()
+        self.expected = sorted(seed.user_id_for(f"user{i}@example.com")
+                               for i in range(self.ROWS))
+        self.resumed = []
+
+    def tearDown(self):
+        pool.set_pool(None)
+        backends.set_backend(self.previous)
+        self.directory.cleanup()
+
+    def resume(self, last):
+        self.resumed.append(last["user_id"])
+        return stream_users.stream_users_in_range(after=last["user_id"])
+
+    def paused_stream(self, **options):
+        return spool.spooled_stream(
+            stream_users.stream_users_in_range(), segment_rows=100,
+            high_watermark=300, low_watermark=100, resume=self.resume,
+            directory=self.spool_directory, **options)
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not reached")
+            time.sleep(0.01)
+
+    def test_rows_replayed_once_across_pauses(self):
+        """Every row arrives exactly once, in order, over several pauses."""
+        user_ids = []
+        for row in self.paused_stream():
+            user_ids.append(row["user_id"])
+            if len(user_ids) % 100 == 0:
+                time.sleep(0.01)  # a consumer slower than the spooler
+        self.assertGreaterEqual(len(self.resumed), 3)
+        self.assertEqual(user_ids, self.expected)
+
+    def test_connection_released_while_paused(self):
+        """With the backlog full, the source's pooled connection is returned."""
+        rows = self.paused_stream()
+        next(rows)
+        self.wait_for(lambda: self.pool.stats()["in_use"] == 0)
+        self.assertEqual(self.resumed, [])  # paused, not finished
+        remaining = sum(1 for _ in rows)
+        self.assertEqual(remaining, self.ROWS - 1)
+        self.assertGreater(len(self.resumed), 0)
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    def test_temp_directory_removed(self):
+        """The spool directory is gone once the stream is exhausted."""
+        self.assertEqual(sum(1 for _ in self.paused_stream()), self.ROWS)
+        self.assertEqual(os.listdir(self.spool_directory), [])
+
+    def test_early_close_cleans_up(self):
+        """Closing the stream early stops the spooler and frees everything."""
+        rows = self.paused_stream()
+        for _ in range(150):
+            next(rows)
+        rows.close()
+        self.assertEqual(os.listdir(self.spool_directory), [])
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+    def test_source_error_reaches_consumer(self):
+        """An exception in the source is raised after the rows before it."""
+        def failing():
+            yield from stream_users.stream_users_in_range(high="8")
+            raise RuntimeError("connection lost")
+
+        received = 0
+        with self.assertRaisesRegex(RuntimeError, "connection lost"):
+            for _ in spool.spooled_stream(failing(), segment_rows=100,
+                                          directory=self.spool_directory):
+                received += 1
+        self.assertEqual(received, sum(1 for i in self.expected if i < "8"))
+        self.assertEqual(os.listdir(self.spool_directory), [])
+        self.assertEqual(self.pool.stats()["in_use"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()